@@ -0,0 +1,177 @@
+"""
+Intraday bar windows as one (assets x bars) matrix.
+
+``data.history`` hands back a (minutes x assets) frame. The functions here
+turn that into ``bar_size``-minute bars for every asset at once, without a
+Python loop over the assets.
+"""
+import numpy as np
+import pandas as pd
+
+# how the minutes of a bar combine into the bar, per field
+BAR_REDUCTIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'price': 'last',
+    'volume': 'sum',
+}
+
+
+def bar_starts(minutes, bar_size, tz='America/New_York'):
+    """
+    Positions in ``minutes`` where a ``bar_size``-minute bar starts.
+
+    Bars are counted from the first minute of each session, so the last bar
+    of a session can be short and never spans two sessions.
+
+    Parameters
+    ----------
+    minutes : pd.DatetimeIndex
+        Trading minutes in ascending order
+    bar_size : int
+        Minutes per bar
+    tz : str, optional
+        Timezone the sessions' dates are taken in
+
+    Returns
+    -------
+    np.ndarray
+    """
+    if minutes.tz is not None:
+        minutes = minutes.tz_convert(tz)
+    days = minutes.normalize().asi8
+    first_of_day = np.flatnonzero(np.diff(days, prepend=days[:1] - 1))
+    day_lengths = np.diff(first_of_day, append=len(days))
+    # each minute's position within its session
+    positions = np.arange(len(days)) - np.repeat(first_of_day, day_lengths)
+    return np.flatnonzero(positions % bar_size == 0)
+
+
+def resample_minutes(values, starts, how='last'):
+    """
+    Combine the minute columns of ``values`` into bars.
+
+    Missing minutes are skipped; a bar without any minutes is NaN (0 for
+    'sum').
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d array shaped (assets, minutes)
+    starts : np.ndarray
+        The first minute of each bar, see bar_starts
+    how : str
+        'first', 'last', 'max', 'min' or 'sum'
+
+    Returns
+    -------
+    np.ndarray
+        2d array shaped (assets, len(starts)) of the same dtype
+    """
+    if how == 'sum':
+        return np.add.reduceat(np.nan_to_num(values, nan=0.0), starts, axis=1)
+    if how == 'max':
+        return np.fmax.reduceat(values, starts, axis=1)
+    if how == 'min':
+        return np.fmin.reduceat(values, starts, axis=1)
+
+    valid = ~np.isnan(values)
+    columns = np.arange(values.shape[1])
+    if how == 'first':
+        picked = np.minimum.reduceat(
+            np.where(valid, columns, values.shape[1]), starts, axis=1
+        )
+        found = picked < np.append(starts[1:], values.shape[1])
+    elif how == 'last':
+        picked = np.maximum.reduceat(np.where(valid, columns, -1), starts, axis=1)
+        found = picked >= starts
+    else:
+        raise ValueError(f"unknown reduction {how!r}")
+
+    bars = np.take_along_axis(values, np.where(found, picked, 0), axis=1)
+    bars[~found] = np.nan
+    return bars
+
+
+def last_valid(values, length):
+    """
+    The last ``length`` non-NaN entries of every row that has that many.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d array shaped (rows, columns)
+    length : int
+
+    Returns
+    -------
+    mask : np.ndarray
+        Boolean array, True for the rows with at least ``length`` entries
+    matrix : np.ndarray
+        2d array shaped (mask.sum(), length)
+    """
+    valid = ~np.isnan(values)
+    mask = valid.sum(axis=1) >= length
+    valid = valid[mask]
+    # positions of the valid entries, in order, ahead of the missing ones
+    order = np.argsort(~valid, axis=1, kind='stable')
+    picks = valid.sum(axis=1)[:, np.newaxis] - length + np.arange(length)
+    columns = np.take_along_axis(order, picks, axis=1)
+    return mask, np.take_along_axis(values[mask], columns, axis=1)
+
+
+def load_bar_window(
+    data,
+    assets,
+    window_length,
+    bar_size,
+    field='open',
+    minutes_in_day=391,
+    history=None,
+):
+    """
+    ``bar_size``-minute bars over the last ``window_length`` sessions.
+
+    Fetches ``window_length * minutes_in_day`` minutes of ``field`` for all
+    ``assets`` in one call, resamples them to bars and keeps the assets with
+    at least ``(minutes_in_day // bar_size) * window_length`` bars, which
+    are the bars returned.
+
+    Parameters
+    ----------
+    data : zipline.protocol.BarData
+    assets : iterable of zipline.assets.Asset
+    window_length : int
+        Sessions in the window
+    bar_size : int
+        Minutes per bar
+    field : str, optional
+        One of BAR_REDUCTIONS
+    minutes_in_day : int, optional
+    history : callable, optional
+        Called as ``history(assets, field, bar_count)`` instead of
+        ``data.history(assets, field, bar_count, '1m')``
+
+    Returns
+    -------
+    assets : list
+        The assets with enough bars
+    bars : np.ndarray
+        float32 array shaped (len(assets), bars)
+    """
+    minutes_in_window = window_length * minutes_in_day
+    if history is None:
+        minute_frame = data.history(list(assets), field, minutes_in_window, '1m')
+    else:
+        minute_frame = history(list(assets), field, minutes_in_window)
+
+    assets = list(minute_frame.columns)
+    values = minute_frame.values.astype(np.float32).T
+    starts = bar_starts(pd.DatetimeIndex(minute_frame.index), bar_size)
+    bars = resample_minutes(values, starts, BAR_REDUCTIONS[field])
+
+    lookback_length = (minutes_in_day // bar_size) * window_length
+    mask, bars = last_valid(bars, lookback_length)
+    return [asset for asset, keep in zip(assets, mask) if keep], bars
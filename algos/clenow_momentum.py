@@ -6,8 +6,6 @@ rebalances every quarter and holds about 30 - 50 stocks.
 
 # todo: use correlation for quality of momentum? https://realpython.com/python310-new-features/#new-functions-in-the-statistics-module
 
-import numpy as np
-from scipy import stats
 import re
 import pandas
 
@@ -23,12 +21,16 @@ from zipline.api import (
     get_datetime,
 )
 from zipline.finance import commission
-from zipline.utils.events import date_rules, time_rules
-from zipline.pipeline import Pipeline, CustomFactor
+from zipline.utils.events import time_rules
+from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import EquityPricing
-from zipline.pipeline.factors import Returns, AverageDollarVolume
+from zipline.pipeline.factors import Returns
 from zipline.errors import CannotOrderDelistedAsset
 
+from algos.factors import ClenowMomentum, T500US
+from algos.pipeline_cache import cache_pipelines
+from algos.schedule import every_n_months
+
 '''
 from zipline.pipeline.filters.fundamentals import (
     IsPrimaryShare,
@@ -38,38 +40,6 @@ from zipline.pipeline.filters.fundamentals import (
 '''
 
 
-class MomentumQuality(CustomFactor):
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-
-        prices = close.transpose()
-        x = np.arange(self.window_length)
-        output = []
-        for col in prices:
-            slope, _, r_value, _, _ = stats.linregress(x, col)
-            annualized_slope = (np.power(np.exp(slope), 250) - 1) * 100
-            output.append(annualized_slope * (r_value**2))
-
-        out[:] = output
-
-
-def my_default_us_equity_mask():
-
-    has_prev_close = EquityPricing.close.latest.notnull()
-    has_prev_vol = EquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def T500US():
-
-    tradables = my_default_us_equity_mask()
-
-    return AverageDollarVolume(window_length=200, mask=tradables).top(500)
-
-
 def initialize(context):
     """
     Called once at the start of the algorithm.
@@ -91,7 +61,11 @@ def initialize(context):
 
     set_commission(commission.PerTrade(cost=0.0))
 
-    schedule_function(rebalance, date_rules.month_start(), time_rules.market_open())
+    schedule_function(
+        rebalance, every_n_months(context.rebalance_freq), time_rules.market_open()
+    )
+
+    cache_pipelines(context)
 
     attach_pipeline(make_pipeline(context), 'pipe')
 
@@ -106,7 +80,7 @@ def make_pipeline(context):
 
     base_universe = T500US()
 
-    quality_returns = MomentumQuality(
+    quality_returns = ClenowMomentum(
         inputs=[EquityPricing.close],
         window_length=months_to_days(context.window_length),
         mask=base_universe,
@@ -155,9 +129,6 @@ def rebalance(context, data):
         context.tf_filter = False
     '''
 
-    if get_datetime().month not in range(1, 13, context.rebalance_freq):
-        return
-
     context.output = pipeline_output('pipe')
 
     returns = context.output['returns']
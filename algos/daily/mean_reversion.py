@@ -12,7 +12,6 @@ Ideas:
     - rank on biggest move from EMA and lowest RSI?
  - mean reversion: for any MR strategy set something like a 100 EMA as a guard
 """
-import talib
 from pandas import Timedelta
 import zipline.protocol
 from zipline.algorithm import TradingAlgorithm
@@ -32,26 +31,11 @@ from zipline.utils.events import date_rules, time_rules
 from zipline.protocol import BarData, Account
 from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import USEquityPricing
-from zipline.pipeline.factors import AverageDollarVolume, SimpleMovingAverage
+from zipline.pipeline.factors import SimpleMovingAverage
 
-
-def my_default_us_equity_mask():
-    has_prev_close = USEquityPricing.close.latest.notnull()
-    has_prev_vol = USEquityPricing.volume.latest > 0
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=200, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
-def T1000US():
-    return _tus(1000)
+from algos.factors import T500US
+from algos.indicators import StreamingIndicators
+from algos.screens import ranked
 
 
 def initialize(context: TradingAlgorithm):
@@ -65,6 +49,7 @@ def initialize(context: TradingAlgorithm):
     context.max_concentration = 0.04
     context.names_to_buy = None
     context.position_dates = {}
+    context.indicators = StreamingIndicators(ema_periods=(5,), rsi_periods=(2,))
 
     set_commission(commission.PerTrade(cost=0.0))
 
@@ -90,6 +75,12 @@ def rebalance_start(context: TradingAlgorithm, data: BarData):
 
     open_ = pipeline_output('pipe')['open']
 
+    #  the universe is updated whole, so names don't get reseeded as they
+    #  go in and out of the price cap
+    held = list(context.portfolio.positions)
+    context.indicators.update(data, dict.fromkeys([*open_.index, *held]))
+    positions = context.indicators.frame(held)
+
     for equity, position in context.portfolio.positions.items():
         if equity not in context.position_dates:
             print(equity)
@@ -99,39 +90,26 @@ def rebalance_start(context: TradingAlgorithm, data: BarData):
             del context.position_dates[equity]
             continue
 
-        historical_opens = data.history(equity, "open", 10, "1d")
-        rsi = talib.RSI(historical_opens, timeperiod=2)
-        ema = talib.EMA(historical_opens, timeperiod=5)
+        latest = positions.loc[equity]
         #  todo: put in stops once breaks back above ema
-        if rsi.iloc[-1] >= 80:
+        if latest.rsi2 >= 80:
             context.rsi_exits += 1
             order_target_percent(equity, 0)
             del context.position_dates[equity]
-        elif ema.iloc[-1] < historical_opens.iloc[-1]:
+        elif latest.ema5 < latest.price:
             context.ema_exits += 1
             order_target_percent(equity, 0)
             del context.position_dates[equity]
 
     max_price = context.account.settled_cash * context.max_concentration
     open_ = open_[open_ <= max_price]
-    historical_opens = data.history(open_.index, "open", 10, "1d")
-    rsi = historical_opens.apply(lambda col: talib.RSI(col, timeperiod=2))
-    ema = historical_opens.apply(lambda col: talib.EMA(col, timeperiod=5))
-
-    combo = [
-        (
-            key,
-            historical_opens.get(key).iloc[-1],
-            ema.get(key).iloc[-1],
-            rsi.get(key).iloc[-1],
-        )
-        for key in historical_opens.keys()
-    ]
-    below = [x for x in combo if x[1] < x[2] and x[3] <= 10]
-    sorted_below = sorted(below, key=lambda x: (x[2] - x[1]) / x[1], reverse=True)
+    latest = context.indicators.frame(open_.index)
+
+    below = latest[(latest.price < latest.ema5) & (latest.rsi2 <= 10)]
+    sorted_below = ranked(below, (below.ema5 - below.price) / below.price)
     open_order_value = 0
 
-    for name, price in ((x[0], x[1]) for x in sorted_below):
+    for name, price in zip(sorted_below.index, sorted_below.price):
         if (
             name not in context.position_dates
             and data.can_trade(name)
@@ -8,9 +8,10 @@ rebalances every quarter and holds about 30 - 50 stocks.
 import numpy as np
 from operator import itemgetter
 
-import talib
 from scipy import stats
 
+from pandas import DataFrame
+
 from zipline.api import (
     set_commission,
     set_slippage,
@@ -22,39 +23,15 @@ from zipline.api import (
     symbol,
 )
 from zipline import get_calendar
-from collections import namedtuple
 from zipline.finance import commission, slippage
 from zipline.utils.events import date_rules, time_rules
 from zipline.pipeline import Pipeline
-from zipline.pipeline.data.equity_pricing import EquityPricing
 from zipline.pipeline.data.equity_pricing import USEquityPricing
-from zipline.pipeline.factors import AverageDollarVolume, Returns
+from zipline.pipeline.factors import Returns
 from zipline.errors import CannotOrderDelistedAsset
 
-
-def my_default_us_equity_mask():
-
-    has_prev_close = EquityPricing.close.latest.notnull()
-    has_prev_vol = EquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=10, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
-def T1000US():
-    return _tus(1000)
-
-
-def T2000US():
-    return _tus(2000)
+from algos import indicators
+from algos.factors import T1000US
 
 
 # class InstantSlippage(slippage.SlippageModel):
@@ -97,7 +74,7 @@ def initialize(context):
 def make_pipeline(context):
     """TODO"""
 
-    base_universe = T1000US()
+    base_universe = T1000US(window_length=10)
 
     return Pipeline(screen=base_universe, columns={"open": USEquityPricing.open.latest})
 
@@ -162,9 +139,6 @@ def make_pipeline(context):
 #     return [(asset, mom) for asset, mom in computed]
 
 
-PriceData = namedtuple("PriceData", ["key", "open", "low_band", "rsi"])
-
-
 def rebalance(context, data):
 
     print(str(get_datetime('America/New_York')))
@@ -173,25 +147,19 @@ def rebalance(context, data):
     assets = [symbol('COST')]
 
     historical_opens = data.history(assets, 'open', 50, '1d')
-    bbands = historical_opens.apply(lambda col: talib.BBANDS(col, timeperiod=9))
-    rsi = historical_opens.apply(lambda col: talib.RSI(col, timeperiod=5))
-
-    combo = [
-        PriceData(
-            key=key,
-            open=historical_opens.get(key).iloc[-1],
-            low_band=bbands.get(key).iloc[2][-1],
-            rsi=rsi.get(key).iloc[-1],
-        )
-        for key in historical_opens.keys()
-    ]
-    rank_filter = [x for x in combo if x.open < x.low_band and x.rsi > 20]
-    # ranking = sorted(rank_filter, key=rank_farthest_from_5_ema, reverse=True)
+    opens = historical_opens.values
+    _, _, low_band = indicators.bbands(opens, timeperiod=9, last=True)
+    rsi = indicators.rsi(opens, timeperiod=5, last=True)
+
+    latest = DataFrame(
+        {'open': opens[-1], 'low_band': low_band, 'rsi': rsi},
+        index=historical_opens.columns,
+    )
+    selected = latest[(latest.open < latest.low_band) & (latest.rsi > 20)]
+    # ranking = ranked(selected, rank_farthest_from_5_ema(selected))
     open_order_value = 0
 
-    for name, open_, low_band, rsi in (
-        (x.key, x.open, x.low_band, x.rsi) for x in rank_filter
-    ):
+    for name in selected.index:
         if (
             # name not in context.position_dates
             data.can_trade(name)
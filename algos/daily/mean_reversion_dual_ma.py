@@ -13,9 +13,8 @@ Notes:
 - Look at instances of winners to see what's the common thread
 """
 import random
-import talib
-from collections import namedtuple
-from pandas import Timedelta
+import numpy as np
+from pandas import DatetimeIndex, NaT, Timedelta
 import zipline.protocol
 from zipline.algorithm import TradingAlgorithm
 from zipline.api import (
@@ -35,26 +34,10 @@ from zipline.utils.events import date_rules, time_rules
 from zipline.protocol import BarData
 from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import USEquityPricing
-from zipline.pipeline.factors import AverageDollarVolume
 
-
-def my_default_us_equity_mask():
-    has_prev_close = USEquityPricing.close.latest.notnull()
-    has_prev_vol = USEquityPricing.volume.latest > 0
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=200, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
-def T1000US():
-    return _tus(1000)
+from algos.factors import T500US
+from algos.indicators import StreamingIndicators
+from algos.screens import ranked
 
 
 def initialize(context: TradingAlgorithm):
@@ -73,6 +56,7 @@ def initialize(context: TradingAlgorithm):
     context.max_concentration = 0.04
     context.names_to_buy = None
     context.position_dates = {}
+    context.indicators = StreamingIndicators(ema_periods=(5, 10), rsi_periods=(2,))
 
     set_commission(commission.PerTrade(cost=0.0))
     set_slippage(us_equities=slippage.NoSlippage())
@@ -100,49 +84,33 @@ def make_pipeline():
 
 def evaluate_current_positions(context, data):
 
-    for equity, position in context.portfolio.positions.items():
-        historical_opens = data.history(equity, 'open', 30, '1d')
-        ema10 = talib.EMA(historical_opens, timeperiod=10)
-        if equity not in context.position_dates:
-            order_target_percent(equity, 0)
-            continue
-        if (
-            context.trading_calendar.sessions_window(get_datetime().date(), -5)[0]
-            >= context.position_dates[equity][0]
-        ):
-            if ema10.iloc[-1] >= historical_opens.iloc[-1]:
-                order_id = order_target_percent(equity, 0)
-                order = context.get_order(order_id)
-                if not order:
-                    continue
-                del context.position_dates[equity]
-                continue
-
-        # stop-loss
-        if (
-            percent_change(
-                historical_opens.iloc[-1] * position.amount,
-                context.position_dates[equity][1],
-            )
-            <= -20
-        ):
-            order_id = order_target_percent(equity, 0)
-            order = context.get_order(order_id)
-            if not order:
-                continue
-            del context.position_dates[equity]
-            continue
-
-        rsi = talib.RSI(historical_opens, timeperiod=2)
-        if rsi.iloc[-1] >= 80:
-            order_id = order_target_percent(equity, 0)
-            order = context.get_order(order_id)
-            if not order:
-                continue
-            del context.position_dates[equity]
+    positions = context.indicators.frame(context.portfolio.positions)
+    untracked = ~positions.index.isin(list(context.position_dates))
+    entries = [
+        context.position_dates.get(equity, (NaT, np.nan)) for equity in positions.index
+    ]
+    cutoff = context.trading_calendar.sessions_window(get_datetime().date(), -5)[0]
+    opened = DatetimeIndex([date for date, _ in entries], tz=cutoff.tz)
+    cost = np.array([cost for _, cost in entries], dtype=np.float64)
+    amount = np.array(
+        [context.portfolio.positions[equity].amount for equity in positions.index],
+        dtype=np.float64,
+    )
+    price = positions.price.values
 
+    # time stop: held for 5 sessions and not above the 10 day EMA
+    ema_exit = (opened <= cutoff) & (positions.ema10.values >= price)
+    with np.errstate(invalid='ignore'):
+        stop_loss = percent_change(price * amount, cost) <= -20
+    rsi_exit = positions.rsi2.values >= 80
 
-PriceData = namedtuple('PriceData', ['key', 'price', 'ema5', 'ema10'])
+    # positions opened outside of screen_and_rank are closed right away
+    exits = positions.index[untracked | ema_exit | stop_loss | rsi_exit]
+
+    for equity in exits:
+        order_id = order_target_percent(equity, 0)
+        if context.get_order(order_id):
+            context.position_dates.pop(equity, None)
 
 
 def screen_and_rank(context, data):
@@ -151,27 +119,13 @@ def screen_and_rank(context, data):
 
     max_price = context.account.settled_cash * context.max_concentration
     open_ = open_[open_ <= max_price]
-    historical_opens = data.history(open_.index, 'open', 30, '1d')
-    ema5 = historical_opens.apply(lambda col: talib.EMA(col, timeperiod=5))
-    ema10 = historical_opens.apply(lambda col: talib.EMA(col, timeperiod=10))
-    rsi = historical_opens.apply(lambda col: talib.RSI(col, timeperiod=2))
-
-    combo = [
-        PriceData(
-            key=key,
-            price=historical_opens.get(key).iloc[-1],
-            ema5=ema5.get(key).iloc[-1],
-            ema10=ema10.get(key).iloc[-1],
-        )
-        for key in historical_opens.keys()
-    ]
-    rank_filter = [x for x in combo if x.price < x.ema5 and x.ema10 < x.ema5]
-    ranking = sorted(rank_filter, key=rank_farthest_from_5_ema, reverse=True)
+    latest = context.indicators.frame(open_.index)
+
+    selected = latest[(latest.price < latest.ema5) & (latest.ema10 < latest.ema5)]
+    ranking = ranked(selected, rank_farthest_from_5_ema(selected))
     open_order_value = 0
 
-    for name, price, ema5, ema10 in (
-        (x.key, x.price, x.ema5, x.ema10) for x in ranking
-    ):
+    for name, price in zip(ranking.index, ranking.price):
         if (
             name not in context.position_dates
             and data.can_trade(name)
@@ -186,16 +140,21 @@ def screen_and_rank(context, data):
 
 def rebalance_start(context, data):
 
+    #  one update for the universe and the positions, ahead of both
+    universe = pipeline_output('pipe').index
+    context.indicators.update(
+        data, dict.fromkeys([*universe, *context.portfolio.positions])
+    )
     evaluate_current_positions(context, data)
     screen_and_rank(context, data)
 
 
-def rank_closest_to_10_ema(x: PriceData):
-    return abs(x.price - x.ema10)
+def rank_closest_to_10_ema(latest):
+    return (latest.price - latest.ema10).abs()
 
 
-def rank_farthest_from_5_ema(x: PriceData):
-    return percent_change(x.price, x.ema5)
+def rank_farthest_from_5_ema(latest):
+    return percent_change(latest.price, latest.ema5)
 
 
 def percent_change(first, second):
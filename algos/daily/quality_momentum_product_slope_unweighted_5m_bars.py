@@ -20,32 +20,10 @@ from zipline.api import (
 )
 from zipline.finance import commission
 from zipline.utils.events import date_rules, time_rules
-from zipline.pipeline import Pipeline, CustomFactor
-from zipline.pipeline.data.equity_pricing import EquityPricing
-from zipline.pipeline.factors import AverageDollarVolume
+from zipline.pipeline import Pipeline
 from zipline.errors import CannotOrderDelistedAsset
 
-
-class MomentumQuality(CustomFactor):
-    """
-    Notes:
-        - using rate of return and r values does seem to do a little better than just rate of return
-        - slope vs returns is negligible, but it looks like returns is a little better
-        - Probably would be worth looking at one more quality measure, e.g. from Quantitative Momentum book
-    """
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-
-        prices = close.transpose()
-        x = np.arange(self.window_length)
-        output = []
-        for col in prices:
-            slope, _, r_value, _, _ = stats.linregress(x, col)
-            output.append(slope * r_value**2)
-
-        out[:] = output
+from algos.factors import T500US
 
 
 def compute_quality_momentum(assets, window_length, data):
@@ -58,23 +36,6 @@ def compute_quality_momentum(assets, window_length, data):
     return close_prices.apply(quality)
 
 
-def my_default_us_equity_mask():
-
-    has_prev_close = EquityPricing.close.latest.notnull()
-    has_prev_vol = EquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=50, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
 def initialize(context):
     """
     Called once at the start of the algorithm.
@@ -98,7 +59,7 @@ def initialize(context):
 def make_pipeline(context):
     """TODO"""
 
-    base_universe = T500US()
+    base_universe = T500US(window_length=50)
 
     # quality_returns = MomentumQuality(
     #     inputs=[EquityPricing.close],
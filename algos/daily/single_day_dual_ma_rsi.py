@@ -6,8 +6,7 @@ Idea:
 - keep hold times short, 1-2 days
 """
 import random
-import talib
-from collections import namedtuple
+from pandas import DataFrame
 from zipline.algorithm import TradingAlgorithm
 from zipline.api import (
     set_commission,
@@ -22,26 +21,10 @@ from zipline.finance import commission, slippage
 from zipline.utils.events import date_rules, time_rules
 from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import USEquityPricing
-from zipline.pipeline.factors import AverageDollarVolume
 
-
-def my_default_us_equity_mask():
-    has_prev_close = USEquityPricing.close.latest.notnull()
-    has_prev_vol = USEquityPricing.volume.latest > 0
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=200, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
-def T1000US():
-    return _tus(1000)
+from algos import indicators
+from algos.factors import T500US
+from algos.screens import ranked
 
 
 class InstantSlippage(slippage.SlippageModel):
@@ -108,9 +91,6 @@ def exit_positions(context, data):
         order_target_percent(equity, 0)
 
 
-PriceData = namedtuple('PriceData', ['key', 'price', 'ema5', 'ema10', 'rsi'])
-
-
 def screen_and_rank(context, data):
 
     open_ = pipeline_output("pipe")["open"]
@@ -118,29 +98,30 @@ def screen_and_rank(context, data):
     max_price = context.account.settled_cash * context.max_concentration
     open_ = open_[open_ <= max_price]
     historical_opens = data.history(open_.index, 'open', 30, '1d')
-    ema5 = historical_opens.apply(lambda col: talib.EMA(col, timeperiod=5))
-    ema10 = historical_opens.apply(lambda col: talib.EMA(col, timeperiod=10))
-    rsi = historical_opens.apply(lambda col: talib.RSI(col, timeperiod=2))
-
-    combo = [
-        PriceData(
-            key=key,
-            price=historical_opens.get(key).iloc[-1],
-            ema5=ema5.get(key).iloc[-1],
-            ema10=ema10.get(key).iloc[-1],
-            rsi=rsi.get(key).iloc[-1],
-        )
-        for key in historical_opens.keys()
-    ]
-    rank_filter = [
-        x for x in combo if x.price < x.ema5 and x.ema10 < x.ema5 and 20 <= x.rsi <= 80
+    opens = historical_opens.values
+    ema5 = indicators.ema(opens, timeperiod=5, last=True)
+    ema10 = indicators.ema(opens, timeperiod=10, last=True)
+    rsi = indicators.rsi(opens, timeperiod=2, last=True)
+
+    latest = DataFrame(
+        {
+            'price': opens[-1],
+            'ema5': ema5,
+            'ema10': ema10,
+            'rsi': rsi,
+        },
+        index=historical_opens.columns,
+    )
+    selected = latest[
+        (latest.price < latest.ema5)
+        & (latest.ema10 < latest.ema5)
+        & (20 <= latest.rsi)
+        & (latest.rsi <= 80)
     ]
-    ranking = sorted(rank_filter, key=rank_farthest_from_5_ema, reverse=True)
+    ranking = ranked(selected, rank_farthest_from_5_ema(selected))
     open_order_value = 0
 
-    for name, price, ema5, ema10 in (
-        (x.key, x.price, x.ema5, x.ema10) for x in ranking
-    ):
+    for name, price in zip(ranking.index, ranking.price):
         if (
             name not in context.position_dates
             and data.can_trade(name)
@@ -160,12 +141,12 @@ def rebalance_start(context, data):
     screen_and_rank(context, data)
 
 
-def rank_closest_to_10_ema(x: PriceData):
-    return abs(x.price - x.ema10)
+def rank_closest_to_10_ema(latest):
+    return (latest.price - latest.ema10).abs()
 
 
-def rank_farthest_from_5_ema(x: PriceData):
-    return percent_change(x.price, x.ema5)
+def rank_farthest_from_5_ema(latest):
+    return percent_change(latest.price, latest.ema5)
 
 
 def percent_change(first, second):
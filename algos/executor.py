@@ -0,0 +1,124 @@
+"""
+Per-asset scoring spread over several cores.
+
+The scoring functions work on an (assets x bars) matrix, see
+``algos.bars.load_bar_window``. ScoringExecutor splits the matrix into
+contiguous row shards, scores every shard in a thread or process pool and
+puts the results back together in asset order. Process workers read their
+rows from one shared memory copy of the matrix instead of being sent
+pickled prices.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from algos.regression import linregress_columns
+
+EXECUTOR_KINDS = ('serial', 'thread', 'process')
+
+
+def linregress_rows(prices):
+    """slope, intercept and r_value of every row of ``prices``, stacked."""
+    return np.stack(linregress_columns(prices.T))
+
+
+def map_rows(func, prices, executor=None):
+    """``func(prices)`` through ``executor``, or inline without one."""
+    if executor is None:
+        return np.asarray(func(prices))
+    return executor.map(func, prices)
+
+
+def _score_shared(task):
+    func, name, shape, dtype, start, stop = task
+    shm = SharedMemory(name=name)
+    try:
+        prices = np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop]
+        # copied so nothing returned points into the shared block
+        scores = np.array(func(prices))
+        del prices
+        return scores
+    finally:
+        shm.close()
+
+
+class ScoringExecutor:
+    """
+    Runs a scoring function over the rows of a price matrix.
+
+    Parameters
+    ----------
+    kind : str, optional
+        'serial' scores in the calling thread, 'thread' in a thread pool and
+        'process' in a process pool. A regression over a few hundred assets
+        takes milliseconds, less than handing it to a pool costs, so the
+        pools only pay off on much larger matrices; measure before using one.
+    workers : int, optional
+        Pool size, the number of cores by default
+    min_rows : int, optional
+        Matrices are split in shards of at least this many rows, so small
+        universes are scored inline rather than paying for the pool
+
+    The scoring function gets a 2d (rows x bars) array and returns an array
+    whose last axis has one entry per row. For the process pool it must be
+    importable, i.e. defined at the top level of a module.
+    """
+
+    def __init__(self, kind='serial', workers=None, min_rows=128):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"kind must be one of {EXECUTOR_KINDS}, not {kind!r}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count()
+        self.min_rows = min_rows
+        self._pool = None
+
+    def map(self, func, prices):
+        """
+        ``func(prices)``, computed shard by shard.
+
+        Returns
+        -------
+        np.ndarray
+            The shards' results concatenated along their last axis
+        """
+        prices = np.ascontiguousarray(prices)
+        shards = min(self.workers, len(prices) // self.min_rows)
+        if self.kind == 'serial' or shards < 2:
+            return np.asarray(func(prices))
+
+        bounds = np.linspace(0, len(prices), shards + 1).astype(int)
+        if self.kind == 'thread':
+            results = self._get_pool().map(
+                func, [prices[start:stop] for start, stop in zip(bounds, bounds[1:])]
+            )
+            return np.concatenate(list(results), axis=-1)
+
+        shm = SharedMemory(create=True, size=prices.nbytes)
+        try:
+            shared = np.ndarray(prices.shape, dtype=prices.dtype, buffer=shm.buf)
+            shared[:] = prices
+            del shared
+            tasks = [
+                (func, shm.name, prices.shape, prices.dtype.str, start, stop)
+                for start, stop in zip(bounds, bounds[1:])
+            ]
+            results = list(self._get_pool().map(_score_shared, tasks))
+        finally:
+            shm.close()
+            shm.unlink()
+        return np.concatenate(results, axis=-1)
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.kind == 'thread':
+                self._pool = ThreadPoolExecutor(self.workers)
+            else:
+                self._pool = ProcessPoolExecutor(self.workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
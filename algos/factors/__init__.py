@@ -0,0 +1,42 @@
+"""
+Pipeline terms shared by the algos.
+
+Zipline memoizes terms on their class and parameters, so two columns (or two
+pipelines) asking for e.g. ``MomentumQuality(window_length=126, mask=...)``
+get the same term and the engine computes it once. That only works when
+they use the same class, which is why the algos import these rather than
+each defining their own.
+"""
+from algos.factors.momentum import (
+    ClenowMomentum,
+    ModReturns,
+    MomentumQuality,
+    Quality,
+    ReturnsQuality,
+    RollingMomentumQuality,
+    TrendRegression,
+)
+from algos.factors.universe import (
+    T500US,
+    T1000US,
+    T2000US,
+    T3000US,
+    my_default_us_equity_mask,
+    tus,
+)
+
+__all__ = [
+    'ClenowMomentum',
+    'ModReturns',
+    'MomentumQuality',
+    'Quality',
+    'ReturnsQuality',
+    'RollingMomentumQuality',
+    'TrendRegression',
+    'T500US',
+    'T1000US',
+    'T2000US',
+    'T3000US',
+    'my_default_us_equity_mask',
+    'tus',
+]
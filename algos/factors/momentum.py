@@ -0,0 +1,215 @@
+"""
+Momentum and momentum quality factors.
+
+They regress each asset's closes against time, for all assets in one pass,
+see ``algos.regression``. Factors with a ``min_obs`` param skip missing
+closes and are NaN for the assets with fewer than ``min_obs`` closes in the
+window (by default, any missing close makes them NaN).
+"""
+import numpy as np
+from zipline import get_calendar
+from zipline.pipeline import CustomFactor
+from zipline.pipeline.data.equity_pricing import EquityPricing
+
+from algos.regression import RollingLinregress, linregress_columns, pearson_columns
+
+MOMENTUM_MEASURES = ('slope', 'returns')
+
+
+def _momentum(close, measure, slope):
+    if measure == 'slope':
+        return slope
+    if measure == 'returns':
+        return (close[-1] - close[0]) / close[0]
+    raise ValueError(f"momentum must be one of {MOMENTUM_MEASURES}, not {measure!r}")
+
+
+class MomentumQuality(CustomFactor):
+    """
+    Momentum weighed by how steadily it was made, the regression r.
+
+    Parameters (besides CustomFactor's)
+    ----------
+    momentum : str
+        'slope' of the regression or the window's 'returns'
+    r_power : int
+        Quality is r ** r_power
+    combine : str
+        'product' for (momentum * momentum_weight) * (quality * quality_weight),
+        'sum' for momentum * momentum_weight + quality * quality_weight
+    momentum_weight, quality_weight : float
+    skip : int
+        Trailing sessions left out, e.g. 21 to skip the last month
+    min_obs : int
+        Closes needed for the regression, see the module docstring
+
+    Notes:
+        - using rate of return and r values does seem to do a little better than just rate of return
+        - slope vs returns is negligible, but it looks like returns is a little better
+        - Probably would be worth looking at one more quality measure, e.g. from Quantitative Momentum book
+    """
+
+    inputs = [EquityPricing.close]
+    params = {
+        'momentum': 'slope',
+        'r_power': 2,
+        'combine': 'product',
+        'momentum_weight': 1.0,
+        'quality_weight': 1.0,
+        'skip': 0,
+        'min_obs': None,
+    }
+
+    def compute(
+        self,
+        today,
+        assets,
+        out,
+        close,
+        momentum,
+        r_power,
+        combine,
+        momentum_weight,
+        quality_weight,
+        skip,
+        min_obs,
+    ):
+        if skip:
+            close = close[:-skip]
+
+        slope, _, r_value = linregress_columns(close, min_obs=min_obs)
+        momentum = _momentum(close, momentum, slope) * momentum_weight
+        quality = r_value**r_power * quality_weight
+
+        if combine == 'product':
+            out[:] = momentum * quality
+        elif combine == 'sum':
+            out[:] = momentum + quality
+        else:
+            raise ValueError(f"combine must be product or sum, not {combine!r}")
+
+
+class ClenowMomentum(CustomFactor):
+    """
+    Clenow's exponential regression momentum: the slope of the log closes
+    against time, compounded over a year, times the regression r ** 2.
+
+    Parameters (besides CustomFactor's)
+    ----------
+    annualization : int
+        Sessions the daily growth rate is compounded over
+    precision : str
+        'float64', or 'float32' to regress in single precision, which halves
+        the memory the window is read through on large universes. Not
+        ``dtype``, which every term already has for its output.
+    min_obs : int
+        Closes needed for the regression, see the module docstring. A
+        non-positive close counts as missing.
+    """
+
+    inputs = [EquityPricing.close]
+    params = {'annualization': 250, 'precision': 'float64', 'min_obs': None}
+
+    def compute(self, today, assets, out, close, annualization, precision, min_obs):
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_close = np.log(close.astype(precision, copy=False))
+        log_close[~np.isfinite(log_close)] = np.nan
+
+        slope, _, r_value = linregress_columns(log_close, precision, min_obs)
+        annualized_slope = np.expm1(slope.astype(np.float64) * annualization) * 100
+        out[:] = annualized_slope * r_value**2
+
+
+class RollingMomentumQuality(CustomFactor):
+    """
+    MomentumQuality (slope * r ** 2) that carries its regression sums over
+    from the previous session instead of re-walking the whole window, see
+    RollingLinregress.
+
+    Parameters (besides CustomFactor's)
+    ----------
+    calendar : str
+        Name of the calendar whose sessions the pipeline runs on
+    """
+
+    inputs = [EquityPricing.close]
+    params = {'calendar': 'XNYS'}
+
+    def compute(self, today, assets, out, close, calendar):
+
+        try:
+            rolling = self._rolling
+        except AttributeError:
+            sessions = get_calendar(calendar).all_sessions
+            rolling = self._rolling = RollingLinregress(self.window_length, sessions)
+
+        slope, _, r_value = rolling.update(today, assets, close)
+        out[:] = slope * r_value**2
+
+
+class Quality(CustomFactor):
+    """
+    Pearson r of the closes against time, NaN for the assets with fewer than
+    ``min_obs`` closes.
+    """
+
+    inputs = [EquityPricing.close]
+    params = {'min_obs': None}
+
+    def compute(self, today, assets, out, close, min_obs):
+
+        out[:] = pearson_columns(close, min_obs)
+
+
+class TrendRegression(CustomFactor):
+    """
+    Everything the momentum factors take from one close window, computed in
+    a single pass over it.
+
+    Outputs
+    -------
+    returns
+        (close[-1] - close[0]) / close[0], the same as zipline's Returns
+    slope, intercept, r_value
+        Regression of the closes against time
+    r_squared
+        r_value ** 2
+
+    Combine the outputs with factor arithmetic, e.g.
+    ``trend.returns * trend.r_squared``, instead of adding a Returns, a
+    Quality and a MomentumQuality over the same window, each of which loads
+    and walks the window on its own. ``min_obs`` applies to the regression
+    outputs, see the module docstring.
+    """
+
+    inputs = [EquityPricing.close]
+    outputs = ['returns', 'slope', 'intercept', 'r_value', 'r_squared']
+    params = {'min_obs': None}
+
+    def compute(self, today, assets, out, close, min_obs):
+
+        slope, intercept, r_value = linregress_columns(close, min_obs=min_obs)
+        out.returns[:] = (close[-1] - close[0]) / close[0]
+        out.slope[:] = slope
+        out.intercept[:] = intercept
+        out.r_value[:] = r_value
+        out.r_squared[:] = r_value**2
+
+
+# the Pearson r of the closes against time is the regression r, sharing the
+# class makes the two the same term
+ReturnsQuality = Quality
+
+
+class ModReturns(CustomFactor):
+    """
+    Returns up to ``skip`` sessions before the end of the window, by default
+    (close[-21] - close[0]) / close[0] to trim off the last month.
+    """
+
+    inputs = [EquityPricing.close]
+    params = {'skip': 20}
+
+    def compute(self, today, assets, out, close, skip):
+        out[:] = (close[-skip - 1] - close[0]) / close[0]
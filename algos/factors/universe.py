@@ -0,0 +1,33 @@
+"""Tradable US equity universes ranked by dollar volume."""
+from zipline.pipeline.data.equity_pricing import EquityPricing
+from zipline.pipeline.factors import AverageDollarVolume
+
+
+def my_default_us_equity_mask():
+
+    has_prev_close = EquityPricing.close.latest.notnull()
+    has_prev_vol = EquityPricing.volume.latest > 0
+
+    return has_prev_close & has_prev_vol
+
+
+def tus(limit, window_length=200):
+    """The ``limit`` most liquid tradable assets by average dollar volume."""
+    tradables = my_default_us_equity_mask()
+    return AverageDollarVolume(window_length=window_length, mask=tradables).top(limit)
+
+
+def T500US(window_length=200):
+    return tus(500, window_length)
+
+
+def T1000US(window_length=200):
+    return tus(1000, window_length)
+
+
+def T2000US(window_length=200):
+    return tus(2000, window_length)
+
+
+def T3000US(window_length=200):
+    return tus(3000, window_length)
@@ -9,8 +9,8 @@ from zipline.api import (
 from zipline.utils.events import date_rules, time_rules
 from zipline.finance import commission
 from zipline.pipeline import Pipeline
-from zipline.pipeline.data import USEquityPricing
-from zipline.pipeline.factors import AverageDollarVolume
+
+from algos.factors import T500US
 
 
 def initialize(context):
@@ -37,22 +37,9 @@ def initialize(context):
     context.top_n_relative_momentum_to_buy = 30  # Number to buy
 
 
-def mask():
-
-    has_prev_close = USEquityPricing.close.latest.notnull()
-    has_prev_vol = USEquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def Q1500US():
-
-    return AverageDollarVolume(window_length=200, mask=mask()).top(500)
-
-
 def make_pipeline():
 
-    universe = Q1500US()
+    universe = T500US()
 
     # roe = Fundamentals.roe.latest
     # sma = SimpleMovingAverage(inputs=[USEquityPricing.close], window_length=100)
@@ -0,0 +1,169 @@
+"""
+Minute history kept in memory between calls to ``data.history``.
+
+An algo that looks at the same trailing window of minutes every few sessions
+refetches mostly the same minutes each time. MinuteHistoryCache keeps each
+(asset, field, frequency) window in a ring buffer and only asks the bar
+reader for the minutes that elapsed since the window was last read.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class RingBuffer:
+    """The last ``capacity`` values of one series, ending at minute ``end``."""
+
+    def __init__(self, values, end):
+        self.values = np.array(values, dtype=np.float64)
+        self.head = 0
+        self.end = end
+
+    @property
+    def capacity(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def tail(self, count):
+        """The last ``count`` values, oldest first."""
+        return self.values[(self.head - count + np.arange(count)) % self.capacity]
+
+    def extend(self, values, end):
+        """Append ``values``, dropping as many of the oldest values."""
+        count = len(values)
+        self.values[(self.head + np.arange(count)) % self.capacity] = values
+        self.head = (self.head + count) % self.capacity
+        self.end = end
+
+
+def _same(a, b):
+    return bool(((a == b) | (np.isnan(a) & np.isnan(b))).all())
+
+
+class MinuteHistoryCache:
+    """
+    ``data.history`` for minute windows, backed by a ring buffer per
+    (asset, field, frequency).
+
+    A call fetches only the minutes each cached window is missing, plus
+    ``overlap`` minutes it already has. A window whose overlap no longer
+    matches (a split or dividend adjusted it) or that is too old to slide
+    forward is fetched whole again. Windows are evicted least recently used
+    first once they hold more than ``max_bytes``, and those of assets that
+    left the algo's universe on ``retain``.
+
+    Parameters
+    ----------
+    calendar : ExchangeCalendar
+        The algo's trading calendar, e.g. ``context.trading_calendar``
+    max_bytes : int, optional
+        Memory cap for the cached windows, 256 MB by default
+    overlap : int, optional
+        Cached minutes refetched to detect adjustments
+    """
+
+    def __init__(self, calendar, max_bytes=256 * 2**20, overlap=30):
+        self.calendar = calendar
+        self.max_bytes = max_bytes
+        self.overlap = overlap
+        self._buffers = OrderedDict()
+        self._nbytes = 0
+
+    def history(self, data, assets, field, bar_count, frequency='1m'):
+        """
+        Same as ``data.history(assets, field, bar_count, frequency)`` for a
+        list of assets and a single field.
+
+        Returns
+        -------
+        pd.DataFrame
+            (bar_count x assets) frame indexed by minute
+        """
+        if frequency != '1m':
+            return data.history(assets, field, bar_count, frequency)
+
+        assets = list(assets)
+        minutes = self.calendar.minutes_window(data.current_dt, -bar_count)
+        window = np.empty((bar_count, len(assets)))
+
+        # assets grouped by how many minutes their cached window is missing
+        missing = {}
+        for i, asset in enumerate(assets):
+            buffer = self._buffers.get((asset, field, frequency))
+            if (
+                buffer is None
+                or buffer.capacity < bar_count
+                or buffer.end < minutes.asi8[0]
+            ):
+                count = bar_count
+            else:
+                count = bar_count - 1 - minutes.asi8.searchsorted(buffer.end)
+                if count and count + self.overlap >= bar_count:
+                    count = bar_count
+            missing.setdefault(count, []).append(i)
+
+        end = minutes.asi8[-1]
+        for count, columns in missing.items():
+            keys = [(assets[i], field, frequency) for i in columns]
+            if count == 0:
+                refetch = []
+                for i, key in zip(columns, keys):
+                    window[:, i] = self._buffers[key].tail(bar_count)
+            elif count == bar_count:
+                refetch = columns
+            else:
+                fetched = data.history(
+                    [assets[i] for i in columns],
+                    field,
+                    count + self.overlap,
+                    frequency,
+                ).values
+                refetch = []
+                for j, (i, key) in enumerate(zip(columns, keys)):
+                    buffer = self._buffers[key]
+                    overlap = fetched[: self.overlap, j]
+                    if not _same(buffer.tail(self.overlap), overlap):
+                        refetch.append(i)
+                        continue
+                    buffer.extend(fetched[self.overlap :, j], end)
+                    window[:, i] = buffer.tail(bar_count)
+
+            if refetch:
+                fetched = data.history(
+                    [assets[i] for i in refetch], field, bar_count, frequency
+                ).values
+                for j, i in enumerate(refetch):
+                    self._store((assets[i], field, frequency), fetched[:, j], end)
+                    window[:, i] = fetched[:, j]
+
+        for asset in assets:
+            self._buffers.move_to_end((asset, field, frequency))
+        self._evict()
+
+        return pd.DataFrame(window, index=minutes, columns=assets)
+
+    def _store(self, key, values, end):
+        previous = self._buffers.pop(key, None)
+        if previous is not None:
+            self._nbytes -= previous.nbytes
+        buffer = self._buffers[key] = RingBuffer(values, end)
+        self._nbytes += buffer.nbytes
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes and self._buffers:
+            _, buffer = self._buffers.popitem(last=False)
+            self._nbytes -= buffer.nbytes
+
+    def retain(self, assets):
+        """Drop the windows of every asset not in ``assets``."""
+        assets = set(assets)
+        for key in [key for key in self._buffers if key[0] not in assets]:
+            self._nbytes -= self._buffers.pop(key).nbytes
+
+    def clear(self):
+        self._buffers.clear()
+        self._nbytes = 0
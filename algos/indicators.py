@@ -0,0 +1,431 @@
+"""
+EMA, RSI and Bollinger bands for a whole (days x assets) matrix.
+
+The daily algos used to call TA-Lib once per asset column. These functions
+run the same recurrences once per row, for every column at once, and follow
+TA-Lib's conventions so the results match ``talib.EMA``, ``talib.RSI`` and
+``talib.BBANDS`` column by column:
+
+- leading NaNs are skipped, each column starts at its first valid value
+- the first ``timeperiod - 1`` values (``timeperiod`` for RSI) after that
+  are NaN, the EMA is seeded with their simple average and the RSI with the
+  average gain and loss over its first ``timeperiod`` changes
+- a NaN after the start makes the rest of the column NaN (0 for the RSI)
+
+The algos only read the latest value of each indicator. With ``last=True``
+the functions still run the recurrence over the whole window but return
+just its final row, without allocating the (days x assets) output.
+StreamingIndicators goes one step further and carries the recurrences'
+state over to the next session.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# TA-Lib's TA_IS_ZERO and TA_IS_ZERO_OR_NEG threshold
+_EPSILON = 1e-8
+
+
+def _as_matrix(values):
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return values[:, np.newaxis]
+    return values
+
+
+def _first_valid(values):
+    """Row of the first non-NaN value per column, len(values) for none."""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(values))
+
+
+def _window_rows(values, first, length):
+    """
+    ``values[first[c] + i, c]`` for i in range(length), shaped (length,
+    columns), with the columns that run off the end masked out.
+    """
+    rows = first + np.arange(length)[:, np.newaxis]
+    fits = rows[-1] < len(values)
+    window = np.take_along_axis(values, np.minimum(rows, len(values) - 1), axis=0)
+    return fits, window
+
+
+def _ema_step(prev, value, timeperiod):
+    return (value - prev) * (2.0 / (timeperiod + 1)) + prev
+
+
+def _moves(change):
+    """The gain and the loss (as a positive number) of ``change``."""
+    return np.where(change < 0, 0.0, change), -np.where(change < 0, change, 0.0)
+
+
+def _wilder_step(average, move, timeperiod):
+    return (average * (timeperiod - 1) + move) / timeperiod
+
+
+def _rsi_value(gain, loss):
+    total = gain + loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 100 * (gain / total)
+    # a NaN gain or loss comes out as 0 in TA-Lib as well
+    return np.where(np.abs(total) >= _EPSILON, value, 0.0)
+
+
+def ema(values, timeperiod=30, last=False):
+    """
+    Exponential moving average of every column, ``talib.EMA``.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d array shaped (days, assets), or 1d for a single asset
+    timeperiod : int, optional
+    last : bool, optional
+        Return only the last row
+
+    Returns
+    -------
+    np.ndarray
+        2d array shaped like ``values``, or 1d with one entry per asset
+    """
+    values = _as_matrix(values)
+    out = None if last else np.full(values.shape, np.nan)
+    first = _first_valid(values)
+    start = first + timeperiod - 1
+
+    fits, window = _window_rows(values, first, timeperiod)
+    # summed in order, as TA-Lib does, so the seed matches to the bit
+    total = window[0].copy()
+    for row in window[1:]:
+        total += row
+    prev = np.where(fits, total / timeperiod, np.nan)
+
+    for t in range(max(start.min(), 0), len(values)):
+        prev = np.where(t > start, _ema_step(prev, values[t], timeperiod), prev)
+        if out is not None:
+            out[t] = np.where(t >= start, prev, np.nan)
+    if last:
+        return np.where(fits, prev, np.nan)
+    return out
+
+
+def _rsi_averages(values, timeperiod=14, out=None):
+    """
+    Wilder's average gain and loss of every column at the end of ``values``,
+    the state ``rsi`` carries from row to row.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d array shaped (days, assets)
+    timeperiod : int, optional
+    out : np.ndarray, optional
+        Filled with the RSI of every row, if given
+
+    Returns
+    -------
+    gain, loss : np.ndarray
+        1d arrays with one entry per asset, NaN for the columns too short
+        to seed
+    """
+    first = _first_valid(values)
+    start = first + timeperiod
+
+    fits, window = _window_rows(values, first, timeperiod + 1)
+    gain = np.zeros(values.shape[1])
+    loss = np.zeros(values.shape[1])
+    for change in np.diff(window, axis=0):
+        up, down = _moves(change)
+        gain += up
+        loss += down
+    gain = np.where(fits, gain / timeperiod, np.nan)
+    loss = np.where(fits, loss / timeperiod, np.nan)
+
+    for t in range(max(start.min(), 0), len(values)):
+        step = t > start
+        up, down = _moves(values[t] - values[t - 1])
+        gain = np.where(step, _wilder_step(gain, up, timeperiod), gain)
+        loss = np.where(step, _wilder_step(loss, down, timeperiod), loss)
+        if out is not None:
+            out[t] = np.where(t >= start, _rsi_value(gain, loss), np.nan)
+    return gain, loss
+
+
+def rsi(values, timeperiod=14, last=False):
+    """
+    Wilder's relative strength index of every column, ``talib.RSI``.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d array shaped (days, assets), or 1d for a single asset
+    timeperiod : int, optional
+    last : bool, optional
+        Return only the last row
+
+    Returns
+    -------
+    np.ndarray
+        2d array shaped like ``values``, or 1d with one entry per asset
+    """
+    values = _as_matrix(values)
+    if last:
+        gain, loss = _rsi_averages(values, timeperiod)
+        fits = _first_valid(values) + timeperiod < len(values)
+        return np.where(fits, _rsi_value(gain, loss), np.nan)
+
+    out = np.full(values.shape, np.nan)
+    _rsi_averages(values, timeperiod, out)
+    return out
+
+
+def bbands(values, timeperiod=5, nbdevup=2.0, nbdevdn=2.0, last=False):
+    """
+    Bollinger bands around the simple moving average of every column,
+    ``talib.BBANDS`` with its default SMA.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d array shaped (days, assets), or 1d for a single asset
+    timeperiod : int, optional
+    nbdevup, nbdevdn : float, optional
+        Population standard deviations above and below the average
+    last : bool, optional
+        Return only the last row
+
+    Returns
+    -------
+    upper, middle, lower : np.ndarray
+        2d arrays shaped like ``values``, or 1d with one entry per asset
+    """
+    values = _as_matrix(values)
+    shape = values.shape[1:] if last else values.shape
+    upper = np.full(shape, np.nan)
+    middle = np.full(shape, np.nan)
+    lower = np.full(shape, np.nan)
+    first = _first_valid(values)
+    start = first + timeperiod - 1
+
+    # running sums like TA-Lib's, a value is added when it enters the
+    # window and taken off again when it leaves
+    total = np.zeros(values.shape[1])
+    total2 = np.zeros(values.shape[1])
+    for t in range(max(first.min(), 0), len(values)):
+        entered = t >= first
+        value = np.where(entered, values[t], 0.0)
+        total += value
+        total2 += value * value
+
+        done = t >= start
+        if not last or t == len(values) - 1:
+            mean = total / timeperiod
+            variance = total2 / timeperiod - mean * mean
+            with np.errstate(invalid='ignore'):
+                stddev = np.where(variance < _EPSILON, 0.0, np.sqrt(variance))
+            row = Ellipsis if last else t
+            middle[row] = np.where(done, mean, np.nan)
+            upper[row] = np.where(done, mean + stddev * nbdevup, np.nan)
+            lower[row] = np.where(done, mean - stddev * nbdevdn, np.nan)
+
+        trailing = np.where(done, values[max(t - timeperiod + 1, 0)], 0.0)
+        total -= trailing
+        total2 -= trailing * trailing
+    return upper, middle, lower
+
+
+class StreamingIndicators:
+    """
+    EMA and RSI of each asset's daily bars, carried from session to session.
+
+    The recurrences are advanced by one bar a session instead of being
+    replayed over a fresh history window, so the values no longer depend on
+    the window length. An asset is seeded again from ``warmup`` bars of
+    history when
+
+    - it is seen for the first time, or its window was too short to seed,
+    - it skipped a session, or
+    - its previous bar now differs from the one it took in by more than
+      ``rtol``, e.g. after a split or a dividend adjusted it. Smaller
+      revisions, like a late print changing a daily open by a cent, keep
+      the state.
+
+    Assets left out of an update are dropped.
+
+    The state lives in arrays sorted by sid and can be checkpointed to a
+    file and restored, e.g. across restarts of a live algo.
+
+    Parameters
+    ----------
+    ema_periods : tuple of int, optional
+    rsi_periods : tuple of int, optional
+    warmup : int, optional
+        Bars of history a new asset is seeded from
+    field : str, optional
+        The bar field the indicators are computed on
+    rtol : float, optional
+        Relative change of the previous bar that reseeds an asset
+    """
+
+    def __init__(
+        self, ema_periods=(5, 10), rsi_periods=(2,), warmup=30, field='open', rtol=1e-3
+    ):
+        self.ema_periods = tuple(ema_periods)
+        self.rsi_periods = tuple(rsi_periods)
+        self.warmup = warmup
+        self.field = field
+        self.rtol = rtol
+        self.reset()
+
+    def reset(self):
+        self.sids = np.empty(0, dtype=np.int64)
+        # the session (as ns) and value of the last bar each sid took in
+        self.sessions = np.empty(0, dtype=np.int64)
+        self.prices = np.empty(0)
+        self.emas = {period: np.empty(0) for period in self.ema_periods}
+        self.gains = {period: np.empty(0) for period in self.rsi_periods}
+        self.losses = {period: np.empty(0) for period in self.rsi_periods}
+
+    def _seeded(self):
+        """Which sids have every indicator seeded."""
+        seeded = ~np.isnan(self.prices)
+        for values in (*self.emas.values(), *self.gains.values()):
+            seeded &= ~np.isnan(values)
+        return seeded
+
+    def _lookup(self, sids):
+        """Positions of ``sids`` in the state and which of them are in it."""
+        if not len(self.sids):
+            return np.zeros(len(sids), dtype=np.intp), np.zeros(len(sids), dtype=bool)
+        idx = np.clip(np.searchsorted(self.sids, sids), 0, len(self.sids) - 1)
+        return idx, self.sids[idx] == sids
+
+    @staticmethod
+    def _take(values, idx, found, fill=np.nan):
+        if not len(values):
+            return np.full(len(idx), fill)
+        return np.where(found, values[idx], fill)
+
+    def update(self, data, assets, history=None):
+        """
+        Take in the latest bar of every asset in ``assets``.
+
+        Parameters
+        ----------
+        data : zipline.protocol.BarData
+        assets : iterable of zipline.assets.Asset
+            Every asset the indicators are wanted for this session
+        history : callable, optional
+            Called as ``history(assets, field, bar_count, '1d')`` instead
+            of ``data.history``
+        """
+        fetch = history or data.history
+        assets = list(assets)
+        if not assets:
+            self.reset()
+            return
+
+        recent = fetch(assets, self.field, 2, '1d')
+        previous_session, session = recent.index.asi8[-2:]
+        previous_price, price = recent.values[-2:].astype(np.float64)
+        sids = np.array([asset.sid for asset in assets], dtype=np.int64)
+
+        idx, found = self._lookup(sids)
+        known = found & self._take(self._seeded(), idx, found, False).astype(bool)
+        last_session = self._take(self.sessions, idx, found, -1)
+        # a second update in the same session keeps the state as it is
+        current = known & (last_session == session)
+        advance = (
+            known
+            & ~current
+            & (last_session == previous_session)
+            & np.isclose(
+                self._take(self.prices, idx, found),
+                previous_price,
+                rtol=self.rtol,
+                atol=0.0,
+            )
+        )
+
+        up, down = _moves(price - previous_price)
+        emas = {}
+        for period in self.ema_periods:
+            state = self._take(self.emas[period], idx, found)
+            emas[period] = np.where(advance, _ema_step(state, price, period), state)
+        gains = {}
+        losses = {}
+        for period in self.rsi_periods:
+            gain = self._take(self.gains[period], idx, found)
+            loss = self._take(self.losses[period], idx, found)
+            gains[period] = np.where(advance, _wilder_step(gain, up, period), gain)
+            losses[period] = np.where(advance, _wilder_step(loss, down, period), loss)
+
+        seed = ~(advance | current)
+        if seed.any():
+            seeding = [asset for asset, flag in zip(assets, seed) if flag]
+            window = fetch(seeding, self.field, self.warmup, '1d').values
+            for period in self.ema_periods:
+                emas[period][seed] = ema(window, period, last=True)
+            for period in self.rsi_periods:
+                gains[period][seed], losses[period][seed] = _rsi_averages(
+                    _as_matrix(window), period
+                )
+
+        order = np.argsort(sids, kind='stable')
+        self.sids = sids[order]
+        self.sessions = np.full(len(sids), session, dtype=np.int64)
+        self.prices = price[order]
+        self.emas = {period: values[order] for period, values in emas.items()}
+        self.gains = {period: values[order] for period, values in gains.items()}
+        self.losses = {period: values[order] for period, values in losses.items()}
+
+    def frame(self, assets):
+        """
+        The latest values for ``assets``, NaN for any not in the last update.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by asset, with a 'price' column plus 'ema<period>' and
+            'rsi<period>' columns, e.g. 'ema5' and 'rsi2'
+        """
+        assets = list(assets)
+        idx, found = self._lookup(
+            np.array([asset.sid for asset in assets], dtype=np.int64)
+        )
+        columns = {'price': self._take(self.prices, idx, found)}
+        for period in self.ema_periods:
+            columns[f'ema{period}'] = self._take(self.emas[period], idx, found)
+        for period in self.rsi_periods:
+            gains = self.gains[period]
+            values = np.where(
+                np.isnan(gains), np.nan, _rsi_value(gains, self.losses[period])
+            )
+            columns[f'rsi{period}'] = self._take(values, idx, found)
+        return pd.DataFrame(columns, index=assets)
+
+    def checkpoint(self, path):
+        """Save the state to ``path``, an ``.npz`` file."""
+        arrays = {'sids': self.sids, 'sessions': self.sessions, 'prices': self.prices}
+        for period in self.ema_periods:
+            arrays[f'ema{period}'] = self.emas[period]
+        for period in self.rsi_periods:
+            arrays[f'gain{period}'] = self.gains[period]
+            arrays[f'loss{period}'] = self.losses[period]
+        staging = f"{path}.{os.getpid()}.npz"
+        np.savez(staging, **arrays)
+        os.replace(staging, path)
+
+    def restore(self, path):
+        """Load the state saved by ``checkpoint``, with the same periods."""
+        with np.load(path, allow_pickle=False) as saved:
+            self.sids = saved['sids']
+            self.sessions = saved['sessions']
+            self.prices = saved['prices']
+            self.emas = {period: saved[f'ema{period}'] for period in self.ema_periods}
+            self.gains = {period: saved[f'gain{period}'] for period in self.rsi_periods}
+            self.losses = {
+                period: saved[f'loss{period}'] for period in self.rsi_periods
+            }
+        return self
@@ -15,67 +15,14 @@ from zipline.api import (
     get_datetime,
 )
 from zipline.finance import commission
-from zipline.utils.events import date_rules, time_rules
-from zipline.pipeline import Pipeline, CustomFactor
+from zipline.utils.events import time_rules
+from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import EquityPricing
-from zipline.pipeline.factors import Returns, AverageDollarVolume
 from zipline.errors import CannotOrderDelistedAsset
 
-
-class MomentumQuality(CustomFactor):
-    """
-    Notes:
-        - using rate of return and r values does seem to do a little better than just rate of return
-        - slope vs returns is negligible, but it looks like returns is a little better
-        - Probably would be worth looking at one more quality measure, e.g. from Quantitative Momentum book
-    """
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-
-        prices = close.transpose()
-        x = np.arange(self.window_length)
-        output = []
-        for col in prices:
-            _, _, r_value, _, _ = stats.linregress(x, col)
-            returns = (col[-1] - col[0]) / col[0]
-            output.append((returns * 0.7) + (r_value * 0.3))
-
-        out[:] = output
-
-
-class ReturnsQuality(CustomFactor):
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-        prices = close.transpose()
-        x = np.arange(self.window_length)
-        output = []
-        for col in prices:
-            try:
-                r_value, _ = stats.pearsonr(x, col)
-                output.append(r_value)
-            except ValueError as error:
-                # print(error)
-                output.append(0)
-        out[:] = output
-
-
-def my_default_us_equity_mask():
-
-    has_prev_close = EquityPricing.close.latest.notnull()
-    has_prev_vol = EquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def T500US():
-
-    tradables = my_default_us_equity_mask()
-
-    return AverageDollarVolume(window_length=200, mask=tradables).top(500)
+from algos.factors import T500US, TrendRegression
+from algos.pipeline_cache import cache_pipelines
+from algos.schedule import every_n_months
 
 
 def r2_value(x):
@@ -145,7 +92,11 @@ def initialize(context):
 
     set_commission(commission.PerTrade(cost=0.0))
 
-    schedule_function(rebalance, date_rules.month_start(), time_rules.market_open())
+    schedule_function(
+        rebalance, every_n_months(context.rebalance_freq), time_rules.market_open()
+    )
+
+    cache_pipelines(context)
 
     attach_pipeline(make_pipeline(context), 'pipe')
 
@@ -160,23 +111,15 @@ def make_pipeline(context):
 
     base_universe = T500US()
 
-    returns = Returns(
-        inputs=[EquityPricing.close],
-        window_length=months_to_days(context.window_length),
-        mask=base_universe,
-    )
-
-    quality = ReturnsQuality(
-        inputs=[EquityPricing.close],
-        window_length=months_to_days(context.window_length),
-        mask=base_universe,
-    )
-
-    mom_quality = MomentumQuality(
+    # returns, quality and their combination share one load of the window
+    trend = TrendRegression(
         inputs=[EquityPricing.close],
         window_length=months_to_days(context.window_length),
         mask=base_universe,
     )
+    returns = trend.returns
+    quality = trend.r_value
+    mom_quality = 0.7 * returns + 0.3 * quality
 
     pipe = Pipeline(
         # screen=(base_universe & (quality >= .85)),
@@ -223,9 +166,6 @@ def rebalance(context, data):
         context.tf_filter = False
     '''
 
-    if get_datetime().month not in range(1, 13, context.rebalance_freq):
-        return
-
     context.output = pipeline_output('pipe')
 
     returns = context.output['returns']
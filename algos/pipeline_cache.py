@@ -0,0 +1,285 @@
+"""
+Pipeline results kept on disk between backtest runs.
+
+A parameter sweep over portfolio construction (``number_of_stocks``, stops,
+...) reruns the same pipeline over the same sessions each time.
+CachedPipelineEngine stands in for the algo's pipeline engine and saves each
+chunk it computes to a columnar ``.npz`` file, keyed by
+
+- the bundle ingestion the algo runs on,
+- a hash of the pipeline's term graph and
+- the chunk's first and last session,
+
+so the next run with the same pipeline reads the chunk back instead of
+computing it. ``pipeline_output`` is unchanged, the algo calls
+``cache_pipelines(context)`` in ``initialize`` and that's it.
+
+The hash covers the terms, their params and inputs, and for term classes
+defined outside zipline the source of their module and of the modules of
+the same package it uses (``algos.regression`` for the factors in
+``algos.factors``). Bump ``version`` (or delete the cache directory) after
+changing anything else the terms depend on.
+"""
+import hashlib
+import inspect
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import zipline
+from zipline.pipeline.data.dataset import BoundColumn
+from zipline.pipeline.term import Term
+from zipline.utils import paths as pth
+
+DATE_FORMAT = '%Y%m%d'
+
+
+# what a term is built from, the same fields zipline memoizes terms on
+TERM_FIELDS = (
+    'domain',
+    'dtype',
+    'missing_value',
+    'window_safe',
+    'ndim',
+    'params',
+    'inputs',
+    'outputs',
+    'window_length',
+    'mask',
+)
+
+
+def _is_zipline(cls):
+    return cls.__module__.split('.')[0] == 'zipline'
+
+
+@lru_cache(maxsize=None)
+def _module_source(name):
+    """
+    Source of the module ``name`` and of the modules of its package that it
+    uses, e.g. ``algos.regression`` for ``algos.factors.momentum``.
+    """
+    package = name.split('.')[0]
+    sources = []
+    pending, seen = [name], {name}
+    while pending:
+        module = sys.modules.get(pending.pop())
+        if module is None:
+            continue
+        try:
+            sources.append(inspect.getsource(module))
+        except (OSError, TypeError):
+            pass
+        for value in list(vars(module).values()):
+            used = inspect.getmodule(value)
+            if (
+                used is not None
+                and used.__name__.split('.')[0] == package
+                and used.__name__ not in seen
+            ):
+                seen.add(used.__name__)
+                pending.append(used.__name__)
+    return '\n'.join(sources)
+
+
+@lru_cache(maxsize=None)
+def _class_source(cls):
+    if _is_zipline(cls):
+        return zipline.__version__
+    return _module_source(cls.__module__)
+
+
+def _term_fields(term):
+    if _is_zipline(type(term)):
+        # zipline's terms keep what else they are built from, e.g. a Rank's
+        # method, in private attributes and nothing that changes across runs
+        return vars(term).items()
+    # other terms may keep anything around, e.g. RollingMomentumQuality its
+    # regression state, so only what they are declared with is described
+    return ((name, getattr(term, name)) for name in TERM_FIELDS if hasattr(term, name))
+
+
+def _describe(value, memo):
+    if isinstance(value, BoundColumn):
+        return value.qualname
+    if isinstance(value, Term):
+        try:
+            return memo[id(value)]
+        except KeyError:
+            pass
+        cls = type(value)
+        fields = sorted(
+            (name, _describe(field, memo)) for name, field in _term_fields(value)
+        )
+        description = f"{cls.__module__}.{cls.__qualname__}{fields}"
+        description += hashlib.sha1(_class_source(cls).encode()).hexdigest()
+        memo[id(value)] = description
+        return description
+    if isinstance(value, (tuple, list)):
+        return repr([_describe(item, memo) for item in value])
+    if isinstance(value, dict):
+        return repr(sorted((key, _describe(item, memo)) for key, item in value.items()))
+    return repr(value)
+
+
+def pipeline_hash(pipeline, version=0):
+    """
+    Hex digest identifying ``pipeline``'s screen, columns and the terms they
+    are computed from.
+    """
+    memo = {}
+    description = repr(
+        (
+            version,
+            _describe(pipeline.screen, memo),
+            sorted(
+                (name, _describe(term, memo)) for name, term in pipeline.columns.items()
+            ),
+        )
+    )
+    return hashlib.sha1(description.encode()).hexdigest()
+
+
+def bundle_ingestion(asset_finder):
+    """
+    (bundle, timestamp) of the ingestion ``asset_finder`` reads, from the
+    path of its assets db, or None if it doesn't read one from a bundle.
+    """
+    database = asset_finder.engine.url.database
+    if not database or database == ':memory:':
+        return None
+    ingestion = os.path.dirname(os.path.abspath(database))
+    return os.path.basename(os.path.dirname(ingestion)), os.path.basename(ingestion)
+
+
+class CachedPipelineEngine:
+    """
+    A pipeline engine that serves ``run_pipeline`` from files under ``root``,
+    computing and saving what is not there yet with ``engine``.
+
+    A request for a range that a saved chunk covers is sliced out of it, so
+    a run that ends earlier than the one that filled the cache still hits
+    it. Anything else is passed through to ``engine``.
+
+    Parameters
+    ----------
+    engine : zipline.pipeline.engine.PipelineEngine
+    asset_finder : zipline.assets.AssetFinder
+    root : str, optional
+        ``<zipline_root>/pipeline_cache`` by default
+    version : int, optional
+        Part of every key, see the module docstring
+    """
+
+    def __init__(self, engine, asset_finder, root=None, version=0):
+        self.engine = engine
+        self.asset_finder = asset_finder
+        self.root = root or os.path.join(pth.zipline_root(), 'pipeline_cache')
+        self.version = version
+        self._ingestion = bundle_ingestion(asset_finder)
+        self._hashes = {}
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def run_pipeline(self, pipeline, start_date, end_date, hooks=None):
+        if self._ingestion is None:
+            return self.engine.run_pipeline(pipeline, start_date, end_date, hooks)
+
+        directory = self._directory(pipeline)
+        cached = self._load(directory, start_date, end_date)
+        if cached is not None:
+            return cached
+
+        result = self.engine.run_pipeline(pipeline, start_date, end_date, hooks)
+        self._save(directory, start_date, end_date, result)
+        return result
+
+    def _directory(self, pipeline):
+        try:
+            digest = self._hashes[id(pipeline)][1]
+        except KeyError:
+            digest = pipeline_hash(pipeline, self.version)
+            # the pipeline is kept so its id can't be reused by another one
+            self._hashes[id(pipeline)] = pipeline, digest
+        return os.path.join(self.root, *self._ingestion, digest)
+
+    def _load(self, directory, start_date, end_date):
+        start, end = start_date.strftime(DATE_FORMAT), end_date.strftime(DATE_FORMAT)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return None
+
+        for name in sorted(names, key=lambda name: name != f"{start}_{end}.npz"):
+            if name.startswith('.'):
+                # another run's file, still being written
+                continue
+            first, _, last = os.path.splitext(name)[0].partition('_')
+            if first <= start and end <= last:
+                break
+        else:
+            return None
+
+        with np.load(os.path.join(directory, name), allow_pickle=False) as saved:
+            dates = pd.DatetimeIndex(saved['dates'])
+            if str(saved['tz']):
+                dates = dates.tz_localize('UTC').tz_convert(str(saved['tz']))
+            sids = saved['sids']
+            columns = {
+                column: saved[f'column_{i}']
+                for i, column in enumerate(saved['columns'])
+            }
+
+        keep = (dates >= start_date) & (dates <= end_date)
+        unique_sids = np.unique(sids[keep])
+        assets = dict(zip(unique_sids, self.asset_finder.retrieve_all(unique_sids)))
+        index = pd.MultiIndex.from_arrays(
+            [dates[keep], [assets[sid] for sid in sids[keep]]]
+        )
+        return pd.DataFrame(
+            {column: values[keep] for column, values in columns.items()},
+            index=index,
+        )
+
+    def _save(self, directory, start_date, end_date, result):
+        if any(dtype.kind not in 'biufM' for dtype in result.dtypes):
+            # only numbers, booleans and dates are saved, not e.g. labels
+            return
+
+        dates = pd.DatetimeIndex(result.index.get_level_values(0))
+        tz = str(dates.tz) if dates.tz is not None else ''
+        if dates.tz is not None:
+            dates = dates.tz_convert(None)
+
+        arrays = {
+            'dates': dates.values,
+            'tz': np.array(tz),
+            'sids': np.array(
+                [asset.sid for asset in result.index.get_level_values(1)],
+                dtype=np.int64,
+            ),
+            'columns': np.array(list(result.columns), dtype=str),
+        }
+        for i, column in enumerate(result.columns):
+            arrays[f'column_{i}'] = result[column].values
+
+        os.makedirs(directory, exist_ok=True)
+        name = (
+            f"{start_date.strftime(DATE_FORMAT)}_{end_date.strftime(DATE_FORMAT)}.npz"
+        )
+        staging = os.path.join(directory, f".{os.getpid()}.{name}")
+        np.savez(staging, **arrays)
+        os.replace(staging, os.path.join(directory, name))
+
+
+def cache_pipelines(context, root=None, version=0):
+    """
+    Serve the pipelines of the algo ``context`` from the on-disk cache, see
+    CachedPipelineEngine. Call it in ``initialize``.
+    """
+    context.engine = CachedPipelineEngine(
+        context.engine, context.asset_finder, root, version
+    )
@@ -6,8 +6,6 @@ rebalances every quarter and holds about 30 - 50 stocks.
 
 # todo: use correlation for quality of momentum? https://realpython.com/python310-new-features/#new-functions-in-the-statistics-module
 
-import numpy as np
-from scipy import stats
 import re
 import pandas
 
@@ -28,15 +26,21 @@ from zipline.api import (
 )
 from zipline.finance import commission, slippage
 from zipline.utils.events import date_rules, time_rules
-from zipline.pipeline import Pipeline, CustomFactor
+from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import EquityPricing
 from zipline.pipeline.factors import (
     Returns,
-    AverageDollarVolume,
     RollingPearsonOfReturns,
 )
 from zipline.errors import CannotOrderDelistedAsset
 
+from algos.factors import (
+    Quality,
+    T3000US,
+    tus,
+)
+from algos.pipeline_cache import cache_pipelines
+
 '''
 from zipline.pipeline.filters.fundamentals import (
     IsPrimaryShare,
@@ -46,96 +50,8 @@ from zipline.pipeline.filters.fundamentals import (
 '''
 
 
-class MomentumQuality(CustomFactor):
-    """
-    Notes:
-        - using rate of return and r values does seem to do a little better than just rate of return
-        - slope vs returns is negligible, but it looks like returns is a little better
-        - Probably would be worth looking at one more quality measure, e.g. from Quantitative Momentum book
-    """
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-
-        prices = close.transpose()
-        x = np.arange(self.window_length)
-        output = []
-        for col in prices:
-            slope, _, r_value, _, _ = stats.linregress(x, col)
-            output.append(slope * r_value**2)
-
-        out[:] = output
-
-
-class Quality(CustomFactor):
-    """
-    Notes:
-        - using rate of return and r values does seem to do a little better than just rate of return
-        - slope vs returns is negligible, but it looks like returns is a little better
-        - Probably would be worth looking at one more quality measure, e.g. from Quantitative Momentum book
-    """
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-
-        prices = close.transpose()
-        x = np.arange(self.window_length)
-        output = []
-        for col in prices:
-            slope, _, r_value, _, _ = stats.linregress(x, col)
-            output.append(r_value)
-
-        out[:] = output
-
-
-class ModReturns(CustomFactor):
-    """
-    Notes:
-        - using rate of return and r values does seem to do a little better than just rate of return
-        - slope vs returns is negligible, but it looks like returns is a little better
-        - Probably would be worth looking at one more quality measure, e.g. from Quantitative Momentum book
-    """
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-        """21 days to trim off last month"""
-        out[:] = (close[-21] - close[0]) / close[0]
-
-
-def my_default_us_equity_mask():
-
-    has_prev_close = EquityPricing.close.latest.notnull()
-    has_prev_vol = EquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=50, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
 def T100US():
-    return _tus(100)
-
-
-def T1000US():
-    return _tus(1000)
-
-
-def T2000US():
-    return _tus(2000)
-
-
-def T3000US():
-    return _tus(3000)
+    return tus(100, window_length=50)
 
 
 class NoSlip(slippage.SlippageModel):
@@ -176,6 +92,8 @@ def initialize(context):
     # schedule_function(rebalance, date_rules.week_start(), time_rules.market_open())
     # schedule_function(check_stops, date_rules.every_day(), time_rules.market_open())
 
+    cache_pipelines(context)
+
     attach_pipeline(make_pipeline(context), 'pipe')
 
 
@@ -190,7 +108,7 @@ def make_pipeline(context):
     # base_universe = T500US()
     # base_universe = T1000US()
     # base_universe = T2000US()
-    base_universe = T3000US()
+    base_universe = T3000US(window_length=50)
 
     quality = Quality(
         inputs=[EquityPricing.close],
@@ -7,10 +7,8 @@ rebalances every quarter and holds about 30 - 50 stocks.
 # todo: use correlation for quality of momentum? https://realpython.com/python310-new-features/#new-functions-in-the-statistics-module
 
 import numpy as np
+from functools import partial
 from operator import itemgetter
-from multiprocessing import Pool
-from multiprocessing import Pool
-from scipy import stats
 import re
 import pandas
 from datetime import date
@@ -27,14 +25,20 @@ from zipline.api import (
     record,
     get_datetime,
 )
-from zipline import get_calendar
 from zipline.finance import commission, slippage
-from zipline.utils.events import date_rules, time_rules
+from zipline.utils.events import time_rules
 from zipline.pipeline import Pipeline, CustomFactor
-from zipline.pipeline.data.equity_pricing import EquityPricing
-from zipline.pipeline.factors import AverageDollarVolume, Returns
+from zipline.pipeline.factors import Returns
 from zipline.errors import CannotOrderDelistedAsset
 
+from algos.factors import T1000US
+from algos.bars import load_bar_window
+from algos.executor import ScoringExecutor, linregress_rows, map_rows
+from algos.history import MinuteHistoryCache
+from algos.pipeline_cache import cache_pipelines
+from algos.schedule import every_n_sessions
+from algos.screens import TopVolume
+
 
 # class Quality(CustomFactor):
 #
@@ -74,31 +78,6 @@ from zipline.errors import CannotOrderDelistedAsset
 #         out[:] = output
 
 
-def my_default_us_equity_mask():
-
-    has_prev_close = EquityPricing.close.latest.notnull()
-    has_prev_vol = EquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=10, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
-def T1000US():
-    return _tus(1000)
-
-
-def T2000US():
-    return _tus(2000)
-
-
 # class InstantSlippage(slippage.SlippageModel):
 #     def process_order(self, data, order):
 #         # Use price from previous bar
@@ -132,23 +111,34 @@ def initialize(context):
     # bar size in minutes
     context.bar_size = 30
 
+    # the 500 assets with the most volume over the last session
+    context.volume_screen = TopVolume(k=500)
+
+    # 500 assets score in a few ms, faster inline than through a pool
+    context.scoring = ScoringExecutor('serial')
+
+    # the minutes of the window from the last rebalance are kept in memory
+    context.minute_history = MinuteHistoryCache(context.trading_calendar)
+
     set_commission(commission.PerTrade(cost=0.0))
     set_slippage(us_equities=NoSlippage())
     # set_slippage(us_equities=slippage.NoSlippage())
 
     schedule_function(
         rebalance,
-        date_rules.every_day(),
+        every_n_sessions(context.rebalance_freq),
         time_rules.market_open(),
     )
 
+    cache_pipelines(context)
+
     attach_pipeline(make_pipeline(context), 'pipe')
 
 
 def make_pipeline(context):
     """TODO"""
 
-    base_universe = T1000US()
+    base_universe = T1000US(window_length=10)
 
     # quality = Quality(
     #     inputs=[EquityPricing.open],
@@ -174,97 +164,59 @@ def make_pipeline(context):
     return pipe
 
 
-def prepare_bars(assets, data, window_length, bar_size, minutes_in_day=391):
-    """Fetch all bar data for the given assets and filter out assets with insufficient pricing data"""
-    minutes_in_window = window_length * minutes_in_day
-    minute_prices = data.history(assets, 'open', minutes_in_window, '1m')
-    bars = [(name, prices.dropna()) for name, prices in minute_prices.iteritems()]
-    lookback_length = (minutes_in_day // bar_size) * window_length
-    return [
-        (name, prices[-lookback_length:])
-        for name, prices in bars
-        if prices.size >= lookback_length
-    ]
-
-
-def top_volume_filter(assets, data, minutes_in_day=391):
-    volume = data.history(assets, 'volume', minutes_in_day, '1m')
-    daily_volumes = sorted(
-        [(name, data[data != 0].agg(sum)) for name, data in volume.iteritems()],
-        key=itemgetter(1),
-        reverse=True,
-    )
-    return [name for name, _ in daily_volumes[:500]]
-
-
-# def _momentum(args):
-#     asset = args[0]
-#     prices = args[1]
-#     slope, _, r_value, _, _ = stats.linregress(np.arange(prices.size), prices)
-#     return asset, r_value, slope * r_value**2
-
-
-def compute_quality_momentum(asset_prices, quality_threshold: float = 0.0):
-    def momentum(prices):
-        slope, _, r_value, _, _ = stats.linregress(np.arange(prices.size), prices)
-        return r_value, slope * r_value**2
-
-    computed = [(asset, momentum(prices)) for asset, prices in asset_prices]
-    return [(asset, mom[1]) for asset, mom in computed if mom[0] > quality_threshold]
-
+def compute_quality_momentum(
+    assets, prices, quality_threshold: float = 0.0, executor=None
+):
+    """prices is an (assets x bars) matrix, see load_bar_window"""
+    slope, _, r_value = map_rows(linregress_rows, prices, executor)
+    momentum = slope * r_value**2
+    keep = r_value > quality_threshold
+    return list(zip(np.asarray(assets, dtype=object)[keep], momentum[keep]))
 
-def filter_quality(asset_prices, quality_threshold: float = 0.0):
-    def quality(prices):
-        _, _, r_value, _, _ = stats.linregress(np.arange(prices.size), prices)
-        return r_value
 
-    computed = [(asset, quality(prices), prices) for asset, prices in asset_prices]
-    return [
-        (asset, prices) for asset, qual, prices in computed if qual > quality_threshold
-    ]
+def filter_quality(assets, prices, quality_threshold: float = 0.0, executor=None):
+    _, _, r_value = map_rows(linregress_rows, prices, executor)
+    keep = r_value > quality_threshold
+    return list(np.asarray(assets, dtype=object)[keep]), prices[keep]
 
 
-def compute_raw_momentum(asset_prices):
-    def momentum(prices):
-        slope, _, _, _, _ = stats.linregress(np.arange(prices.size), prices)
-        return slope
+def compute_raw_momentum(assets, prices, executor=None):
+    slope, _, _ = map_rows(linregress_rows, prices, executor)
+    return list(zip(assets, slope))
 
-    computed = [(asset, momentum(prices)) for asset, prices in asset_prices]
-    return [(asset, mom) for asset, mom in computed]
 
-
-def compute_raw_returns(asset_prices):
-    def returns(prices):
-        return (prices[-1] - prices[0]) / prices[0]
-
-    computed = [(asset, returns(prices)) for asset, prices in asset_prices]
-    return [(asset, mom) for asset, mom in computed]
+def compute_raw_returns(assets, prices):
+    returns = (prices[:, -1] - prices[:, 0]) / prices[:, 0]
+    return list(zip(assets, returns))
 
 
 def rebalance(context, data):
 
-    calendar = get_calendar('NYSE')
-    if (
-        calendar.session_distance(calendar.first_session, get_datetime())
-        % context.rebalance_freq
-    ):
-        return
-
     print(str(get_datetime('America/New_York')))
 
     assets = pipeline_output('pipe').index
 
-    filtered_assets = top_volume_filter(assets, data)
+    filtered_assets = context.volume_screen(data, assets)
+    # the windows of assets that dropped out of the top 500 won't be read again
+    context.minute_history.retain(filtered_assets)
 
-    asset_prices = prepare_bars(
-        filtered_assets, data, context.window_length, context.bar_size
+    assets, prices = load_bar_window(
+        data,
+        filtered_assets,
+        context.window_length,
+        context.bar_size,
+        history=partial(context.minute_history.history, data),
     )
 
-    # momentum = compute_quality_momentum(asset_prices, quality_threshold=0.7)
-    # momentum = compute_raw_momentum(asset_prices)
+    # momentum = compute_quality_momentum(
+    #     assets, prices, quality_threshold=0.7, executor=context.scoring
+    # )
+    # momentum = compute_raw_momentum(assets, prices, executor=context.scoring)
 
-    quality_filtered_assets = filter_quality(asset_prices, quality_threshold=0.0)
-    momentum = compute_raw_returns(quality_filtered_assets)
+    assets, prices = filter_quality(
+        assets, prices, quality_threshold=0.0, executor=context.scoring
+    )
+    momentum = compute_raw_returns(assets, prices)
 
     top_names = set(
         [
@@ -294,5 +246,10 @@ def rebalance(context, data):
             print(error)
 
 
+def analyze(context, perf):
+
+    context.scoring.close()
+
+
 # def record_vars(context, data):
 #     record(account_value=context.account.net_liquidation)
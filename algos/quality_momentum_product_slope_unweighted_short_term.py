@@ -4,9 +4,6 @@ A shorter term momentum approach. Still using days, but shorten it to something
 like a one month lookback with a one week hold time or something like that.
 """
 
-import numpy as np
-from scipy import stats
-
 from zipline.api import (
     set_commission,
     schedule_function,
@@ -18,47 +15,12 @@ from zipline.api import (
 )
 from zipline.finance import commission
 from zipline.utils.events import date_rules, time_rules
-from zipline.pipeline import Pipeline, CustomFactor
+from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import EquityPricing
-from zipline.pipeline.factors import AverageDollarVolume
 from zipline.errors import CannotOrderDelistedAsset
 
-
-class MomentumQuality(CustomFactor):
-
-    inputs = [EquityPricing.close]
-
-    def compute(self, today, assets, out, close):
-
-        prices = close.transpose()
-        x = np.arange(self.window_length)
-        output = []
-        for col in prices:
-            slope, _, r_value, _, _ = stats.linregress(x, col)
-            output.append(slope * r_value**2)
-
-        out[:] = output
-
-
-def my_default_us_equity_mask():
-
-    has_prev_close = EquityPricing.close.latest.notnull()
-    has_prev_vol = EquityPricing.volume.latest > 0
-
-    return has_prev_close & has_prev_vol
-
-
-def _tus(limit):
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=200, mask=tradables).top(limit)
-
-
-def T500US():
-    return _tus(500)
-
-
-def T1000US():
-    return _tus(1000)
+from algos.factors import RollingMomentumQuality, T500US
+from algos.pipeline_cache import cache_pipelines
 
 
 def initialize(context):
@@ -80,6 +42,8 @@ def initialize(context):
 
     schedule_function(rebalance, date_rules.week_start(), time_rules.market_open())
 
+    cache_pipelines(context)
+
     attach_pipeline(make_pipeline(context), 'pipe')
 
 
@@ -92,7 +56,7 @@ def make_pipeline(context):
 
     base_universe = T500US()
 
-    quality_returns = MomentumQuality(
+    quality_returns = RollingMomentumQuality(
         inputs=[EquityPricing.close],
         window_length=months_to_days(context.window_length),
         mask=base_universe,
@@ -4,24 +4,16 @@ from zipline.api import (
     pipeline_output,
     order_target_percent,
     get_open_orders,
-    get_datetime,
 )
-from zipline.utils.events import date_rules, time_rules
+from zipline.utils.events import time_rules
 from zipline.pipeline import Pipeline
 from zipline.pipeline.data.equity_pricing import USEquityPricing
-from zipline.pipeline.factors import Returns, AverageDollarVolume
+from zipline.pipeline.factors import Returns
 from zipline.errors import CannotOrderDelistedAsset
 
-
-def my_default_us_equity_mask():
-    has_prev_close = USEquityPricing.close.latest.notnull()
-    has_prev_vol = USEquityPricing.volume.latest > 0
-    return has_prev_close & has_prev_vol
-
-
-def Q500US():
-    tradables = my_default_us_equity_mask()
-    return AverageDollarVolume(window_length=200, mask=tradables).top(500)
+from algos.factors import T500US
+from algos.pipeline_cache import cache_pipelines
+from algos.schedule import every_n_months
 
 
 def initialize(context):
@@ -36,7 +28,10 @@ def initialize(context):
     #  need to keep track of sell orders
     context.sell_orders = set()
     context.names_to_buy = None
-    schedule_function(rebalance, date_rules.month_start(), time_rules.market_open())
+    schedule_function(
+        rebalance, every_n_months(context.rebalance_freq), time_rules.market_open()
+    )
+    cache_pipelines(context)
     attach_pipeline(make_pipeline(context), "pipe")
 
 
@@ -45,7 +40,7 @@ def months_to_days(months):
 
 
 def make_pipeline(context):
-    base_universe = Q500US()
+    base_universe = T500US()
     returns = Returns(
         inputs=[USEquityPricing.close],
         window_length=months_to_days(context.window_length),
@@ -59,8 +54,6 @@ def make_pipeline(context):
 
 
 def rebalance(context, data):
-    if get_datetime().month not in range(1, 13, context.rebalance_freq):
-        return
     context.output = pipeline_output("pipe")
     returns = context.output["returns"]
     top_long_names = set(returns.nlargest(context.number_of_stocks).keys())
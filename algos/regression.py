@@ -0,0 +1,252 @@
+"""
+Batched ordinary least squares against a time index.
+
+The momentum factors used to call ``scipy.stats.linregress`` once per asset
+column.  The functions here do the same regression for a whole
+(window x assets) matrix in one pass, which is what the pipeline hands to
+``CustomFactor.compute`` anyway.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def x_stats(window_length, dtype=np.float64):
+    """
+    Statistics of ``x = arange(window_length)`` that every regression over a
+    window of that length shares, in ``dtype``.
+
+    Returns
+    -------
+    x_mean : float
+    x_dev : np.ndarray
+        ``x - x_mean`` as a read-only column vector
+    ssxm : float
+        Sum of squared deviations of x
+    """
+    x = np.arange(window_length, dtype=dtype)
+    x_mean = x.mean()
+    x_dev = (x - x_mean)[:, np.newaxis]
+    x_dev.setflags(write=False)
+    ssxm = float(np.square(x_dev).sum())
+    return x_mean, x_dev, ssxm
+
+
+def linregress_columns(y, dtype=np.float64, min_obs=None):
+    """
+    Regress every column of ``y`` against ``arange(len(y))``.
+
+    Matches ``scipy.stats.linregress`` per column on the column's non-NaN
+    rows: a flat column has a slope and r of 0, and a column with fewer
+    than ``min_obs`` of them yields NaN for every statistic.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        2d array shaped (window_length, assets)
+    dtype : np.dtype, optional
+        Precision the regression is computed in. float32 halves the memory
+        the window is read through, at about 7 significant digits.
+    min_obs : int, optional
+        Non-NaN rows a column needs, all of them by default
+
+    Returns
+    -------
+    slope, intercept, r_value : np.ndarray
+        1d arrays with one entry per column of ``y``, in ``dtype``
+    """
+    y = np.asarray(y, dtype=dtype)
+    window_length = y.shape[0]
+    if min_obs is None:
+        min_obs = window_length
+
+    missing = np.isnan(y)
+    if not missing.any():
+        x_mean, x_dev, ssxm = x_stats(window_length, np.dtype(dtype).type)
+        count = np.full(y.shape[1], window_length)
+        y_mean = y.mean(axis=0)
+        y_dev = y - y_mean
+    else:
+        # the same sums over each column's own rows, with x_dev and y_dev
+        # zeroed where y is missing
+        valid = ~missing
+        count = valid.sum(axis=0)
+        x = np.arange(window_length, dtype=dtype)[:, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = (valid * x).sum(axis=0) / count.astype(dtype)
+            y_mean = np.where(valid, y, 0).sum(axis=0) / count.astype(dtype)
+        x_dev = np.where(valid, x - x_mean, 0)
+        y_dev = np.where(valid, y - y_mean, 0)
+        ssxm = np.square(x_dev).sum(axis=0)
+
+    ssxym = (x_dev * y_dev).sum(axis=0)
+    ssym = np.square(y_dev).sum(axis=0)
+
+    r_den = np.sqrt(ssxm * ssym)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = ssxym / ssxm
+        r_value = np.where(r_den == 0.0, 0.0, ssxym / r_den)
+    intercept = y_mean - slope * x_mean
+    # rounding can push a perfect fit a hair past +/-1
+    np.clip(r_value, -1.0, 1.0, out=r_value)
+
+    # fewer than two points do not make a line
+    incomplete = count < max(min_obs, 2)
+    if incomplete.any():
+        slope[incomplete] = np.nan
+        intercept[incomplete] = np.nan
+        r_value[incomplete] = np.nan
+
+    return slope, intercept, r_value
+
+
+def pearson_columns(y, min_obs=None, dtype=np.float64):
+    """
+    Pearson r of every column of ``y`` against time, skipping NaN rows.
+
+    NaN, rather than 0, for the columns with fewer than ``min_obs`` non-NaN
+    rows (all of them by default), see linregress_columns.
+    """
+    return linregress_columns(y, dtype, min_obs)[2]
+
+
+class RollingLinregress:
+    """
+    ``linregress_columns`` for a window that slides forward one row per
+    session.
+
+    Per sid it keeps the running sums of y, x*y and y**2 (NaNs counted
+    separately and summed as zero), so consecutive sessions cost O(1) per
+    asset instead of O(window_length).  A column is rebuilt from the full
+    window when its sid was not seen the previous session, when the row it
+    ended on has changed (an adjustment was applied), and for every column
+    each ``refresh`` sessions to keep rounding error from accumulating.
+    All columns are rebuilt when the previous update was not for the
+    session right before ``today`` in ``sessions``, i.e. when more than one
+    row has left the window.
+    """
+
+    def __init__(self, window_length, sessions, refresh=None):
+        self.window_length = window_length
+        self.sessions = sessions
+        self.refresh = refresh or window_length
+        self.reset()
+
+    def reset(self):
+        self._today = None
+        self._age = 0
+        self._sids = None
+        self._sums = None
+        self._nans = None
+        self._first = None
+        self._last = None
+
+    def update(self, today, sids, y):
+        """
+        Regress every column of ``y`` for the session ``today``.
+
+        Parameters
+        ----------
+        today : pd.Timestamp
+        sids : np.ndarray
+            The sid of each column in ``y``
+        y : np.ndarray
+            2d array shaped (window_length, len(sids))
+
+        Returns
+        -------
+        slope, intercept, r_value : np.ndarray
+        """
+        y = np.asarray(y, dtype=np.float64)
+        sids = np.asarray(sids)
+        n = self.window_length
+        if y.shape[0] != n:
+            raise ValueError(f"expected {n} rows, got {y.shape[0]}")
+
+        num_assets = y.shape[1]
+        sy = np.empty(num_assets)
+        sxy = np.empty(num_assets)
+        syy = np.empty(num_assets)
+        nans = np.empty(num_assets, dtype=np.int64)
+
+        rolled = np.zeros(num_assets, dtype=bool)
+        if self._follows(today) and self._age < self.refresh and len(self._sids):
+            idx = np.clip(np.searchsorted(self._sids, sids), 0, len(self._sids) - 1)
+            prev_last = self._last[idx]
+            rolled = (self._sids[idx] == sids) & (
+                (y[-2] == prev_last) | (np.isnan(y[-2]) & np.isnan(prev_last))
+            )
+
+            idx = idx[rolled]
+            y_out = self._first[idx]
+            y_in = y[-1, rolled]
+            out_z = np.nan_to_num(y_out, nan=0.0)
+            in_z = np.nan_to_num(y_in, nan=0.0)
+            prev_sy, prev_sxy, prev_syy = self._sums[:, idx]
+
+            # x shifts down by one for every row that stays in the window
+            sxy[rolled] = prev_sxy - prev_sy + out_z + (n - 1) * in_z
+            sy[rolled] = prev_sy - out_z + in_z
+            syy[rolled] = prev_syy - out_z * out_z + in_z * in_z
+            nans[rolled] = (
+                self._nans[idx] + np.isnan(y_in) - np.isnan(y_out).astype(np.int64)
+            )
+            self._age += 1
+        else:
+            self._age = 0
+
+        stale = ~rolled
+        if stale.any():
+            window = y[:, stale]
+            missing = np.isnan(window)
+            window = np.where(missing, 0.0, window)
+            sy[stale] = window.sum(axis=0)
+            sxy[stale] = np.arange(n, dtype=np.float64) @ window
+            syy[stale] = np.square(window).sum(axis=0)
+            nans[stale] = missing.sum(axis=0)
+
+        order = np.argsort(sids, kind='stable')
+        self._today = today
+        self._sids = sids[order]
+        self._sums = np.stack([sy, sxy, syy])[:, order]
+        self._nans = nans[order]
+        self._first = y[0, order]
+        self._last = y[-1, order]
+
+        return self._from_sums(sy, sxy, syy, nans)
+
+    def _follows(self, today):
+        if self._today is None:
+            return False
+        i = self.sessions.searchsorted(self._today)
+        return (
+            i + 1 < len(self.sessions)
+            and self.sessions[i] == self._today
+            and self.sessions[i + 1] == today
+        )
+
+    def _from_sums(self, sy, sxy, syy, nans):
+        n = self.window_length
+        x_mean, _, ssxm = x_stats(n)
+
+        y_mean = sy / n
+        ssxym = sxy - x_mean * sy
+        ssym = syy - sy * y_mean
+
+        slope = ssxym / ssxm
+        intercept = y_mean - slope * x_mean
+
+        # a flat column can leave a few ulps of cancellation error behind
+        flat = ssym <= np.abs(syy) * (4 * np.finfo(np.float64).eps)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r_value = np.where(flat, 0.0, ssxym / np.sqrt(ssxm * ssym))
+        np.clip(r_value, -1.0, 1.0, out=r_value)
+
+        incomplete = nans > 0
+        slope[incomplete] = np.nan
+        intercept[incomplete] = np.nan
+        r_value[incomplete] = np.nan
+
+        return slope, intercept, r_value
@@ -0,0 +1,92 @@
+"""
+Date rules for ``schedule_function`` that fire on a fixed subset of sessions.
+
+Rather than waking up every session and working out in the callback whether
+this is a rebalance day, these rules number the calendar's sessions once
+(their ordinals) and pick the sessions to fire on from those numbers.
+Checking a minute is then a set lookup.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+from zipline.utils.events import StatelessRule
+from zipline.utils.memoize import lazyval
+
+
+class SessionOrdinalRule(StatelessRule, ABC):
+    """
+    Fires on the sessions whose ordinal in ``self.cal.all_sessions`` is
+    selected by ``select_ordinals``.
+    """
+
+    @abstractmethod
+    def select_ordinals(self, sessions):
+        """
+        Parameters
+        ----------
+        sessions : pd.DatetimeIndex
+            All the calendar's sessions
+
+        Returns
+        -------
+        np.ndarray
+            The ordinals (positions in ``sessions``) to fire on
+        """
+
+    @lazyval
+    def execution_period_values(self):
+        sessions = self.cal.all_sessions
+        return frozenset(sessions.asi8[self.select_ordinals(sessions)].tolist())
+
+    def should_trigger(self, dt):
+        value = self.cal.minute_to_session_label(dt, direction="none").value
+        return value in self.execution_period_values
+
+
+class EveryNSessions(SessionOrdinalRule):
+    """
+    Fires every ``n`` sessions, on the n-th, 2n-th, ... session counting the
+    ``anchor`` session (the calendar's first session by default) as the 1st.
+    """
+
+    def __init__(self, n, anchor=None):
+        if n < 1:
+            raise ValueError(f"n must be at least 1, not {n}")
+        self.n = n
+        self.anchor = anchor
+
+    def select_ordinals(self, sessions):
+        start = 0 if self.anchor is None else sessions.searchsorted(self.anchor)
+        return np.arange(start + self.n - 1, len(sessions), self.n)
+
+
+class EveryNMonths(SessionOrdinalRule):
+    """
+    Fires on the ``days_offset``-th session of January and every ``n``-th
+    month after it, i.e. of the months in ``range(1, 13, n)``.
+    """
+
+    def __init__(self, n, days_offset=0):
+        if not 1 <= n <= 12:
+            raise ValueError(f"n must be between 1 and 12, not {n}")
+        self.n = n
+        self.days_offset = days_offset
+
+    def select_ordinals(self, sessions):
+        months = sessions.year * 12 + sessions.month - 1
+        month_starts = np.flatnonzero(np.diff(months, prepend=-1))
+        month_ends = np.append(month_starts[1:], len(sessions))
+        ordinals = month_starts + self.days_offset
+        # months too short for the offset are skipped
+        ordinals = ordinals[ordinals < month_ends]
+        return ordinals[(sessions.month[ordinals] - 1) % self.n == 0]
+
+
+def every_n_sessions(n, anchor=None):
+    """Date rule that fires every ``n`` sessions, see EveryNSessions."""
+    return EveryNSessions(n, anchor)
+
+
+def every_n_months(n, days_offset=0):
+    """Date rule that fires at the start of every ``n``-th month, see EveryNMonths."""
+    return EveryNMonths(n, days_offset)
@@ -0,0 +1,83 @@
+"""
+Screens and rankings for the universes the algos trade.
+
+A screen narrows a list of assets with one ``data.history`` call and array
+reductions, like a pipeline filter applied at the time the algo trades. The
+daily algos keep their candidates in a frame with one row per asset, filter
+it with boolean masks and order it with ``ranked``.
+"""
+import numpy as np
+
+
+def top_k(values, k):
+    """
+    Positions of the ``k`` largest entries of ``values``, largest first.
+
+    NaNs rank below every number. Only the top ``k`` are sorted, so this is
+    O(n + k log k) rather than a full sort.
+    """
+    values = np.where(np.isnan(values), -np.inf, values)
+    if k >= len(values):
+        return np.argsort(-values, kind='stable')
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+def ranked(frame, scores, limit=None):
+    """
+    The rows of ``frame`` ordered by ``scores``, highest first.
+
+    Ties keep their order in ``frame``, the same as
+    ``sorted(rows, key=score, reverse=True)``.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+    scores : array-like
+        One score per row
+    limit : int, optional
+        Keep only the first ``limit`` rows
+    """
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind='stable')
+    return frame.iloc[order[:limit]]
+
+
+class TopVolume:
+    """
+    The ``k`` assets that traded the most shares over the last ``window``
+    bars of ``frequency``.
+
+    Parameters
+    ----------
+    k : int, optional
+    window : int, optional
+        Bars to sum the volume over, a 391 minute session by default
+    frequency : str, optional
+    """
+
+    def __init__(self, k=500, window=391, frequency='1m'):
+        self.k = k
+        self.window = window
+        self.frequency = frequency
+
+    def __call__(self, data, assets, history=None):
+        """
+        Parameters
+        ----------
+        data : zipline.protocol.BarData
+        assets : iterable of zipline.assets.Asset
+        history : callable, optional
+            Called as ``history(assets, 'volume', window, frequency)`` instead
+            of ``data.history``, e.g. a MinuteHistoryCache's
+
+        Returns
+        -------
+        list
+            The top assets, most volume first
+        """
+        assets = list(assets)
+        fetch = history or data.history
+        volume = fetch(assets, 'volume', self.window, self.frequency)
+        totals = np.nansum(volume.values, axis=0)
+        columns = list(volume.columns)
+        return [columns[i] for i in top_k(totals, self.k)]
@@ -1,15 +1,38 @@
+"""
+Zipline extension: the csvdir/tiingo bundles and the exchange calendars.
+
+Importing this module registers lazy factories for the XNYS, CMES and
+us_futures calendars (see prebuilt_calendar), which start in 1950 and keep
+the exchange's open times. Every other calendar name still goes through
+zipline's own _fabricate patch of exchange_calendars: its opens are a minute
+after the exchange's (open_times is shifted by one minute) and its
+default_start is 1990.
+"""
 import os
 import sys
+import hashlib
+import json
+import pickle
+import shutil
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from pandas import DataFrame, read_csv, Index, Timedelta, NaT
 import pathlib
 import pytz
-from numpy import empty
+import numpy as np
 from zipline.utils.cli import maybe_show_progress
-from zipline.utils.calendar_utils import register_calendar_alias
+from zipline.utils import paths as pth
+from zipline.data.bcolz_daily_bars import BcolzDailyBarReader
+from zipline.utils.calendar_utils import register_calendar_alias, register_calendar_type
 
-from exchange_calendars.calendar_utils import ExchangeCalendarDispatcher
-from exchange_calendars.errors import InvalidCalendarName
+import exchange_calendars
+from exchange_calendars.exchange_calendar import GLOBAL_DEFAULT_END
+from exchange_calendars.exchange_calendar_cmes import CMESExchangeCalendar
+from exchange_calendars.exchange_calendar_xnys import XNYSExchangeCalendar
+from exchange_calendars.us_futures_calendar import QuantopianUSFuturesCalendar
 
 from zipline.data.bundles import core as bundles
 
@@ -22,33 +45,227 @@ logger = Logger(__name__)
 logger.handlers.append(handler)
 
 
-def _fabricate(self, name: str, **kwargs):
-    """Fabricate calendar with `name` and `**kwargs`."""
+# exchange_calendars has a different default start date that we need to
+# overwrite in order to pass the legacy tests. Zipline's own opens are a
+# minute after the exchange's, these keep the exchange's.
+PREBUILT_CALENDARS = {
+    "XNYS": XNYSExchangeCalendar,
+    "CMES": CMESExchangeCalendar,
+    "us_futures": QuantopianUSFuturesCalendar,
+}
+CALENDAR_START = pd.Timestamp("1950-01-01", tz=pytz.UTC)
+
+# the arrays an ExchangeCalendar computes in __init__, see prebuilt_calendar
+CALENDAR_ARRAYS = (
+    "sessions",
+    "opens",
+    "break_starts",
+    "break_ends",
+    "closes",
+    "late_opens",
+    "early_closes",
+)
+
+
+def prebuilt_calendar(name, start=CALENDAR_START, environ=os.environ):
+    """
+    The calendar `name` starting at `start`, built once and kept on disk.
+
+    Building a calendar from its rules takes about a second for 75 years of
+    sessions. The first build saves the sessions, opens, closes and breaks
+    as .npy files in <zipline root>/calendars/<name>/<versions>, where
+    <versions> names the exchange_calendars and pandas versions; later calls
+    load them memory-mapped. The files are rebuilt when `start` changes or
+    their end is more than a month short of the default end (a year from
+    today), and an upgrade of either library starts a new directory.
+
+    Putting the calendar back together from the arrays relies on the
+    attributes exchange_calendars 3.3 sets in ExchangeCalendar.__init__. If
+    the result doesn't answer for its own sessions as the arrays say (other
+    versions keep other attributes), the calendar is built with its
+    constructor instead.
+
+    Parameters
+    ----------
+    name : str
+        One of PREBUILT_CALENDARS
+    start : pd.Timestamp, optional
+        The first session, 1950-01-01 by default
+    environ : mapping, optional
+        The environment to resolve the zipline root with
+
+    Returns
+    -------
+    ExchangeCalendar
+    """
+    calendar_type = PREBUILT_CALENDARS[name]
+    versions = {
+        "exchange_calendars": exchange_calendars.__version__,
+        "pandas": pd.__version__,
+    }
+    cache_dir = os.path.join(
+        pth.zipline_root(environ),
+        "calendars",
+        name,
+        "_".join(f"{library}-{version}" for library, version in versions.items()),
+    )
+    end = GLOBAL_DEFAULT_END.floor("D")
+    spec = dict(versions, start=start.isoformat())
+
+    calendar = _load_calendar(cache_dir, calendar_type, spec, end)
+    if calendar is None:
+        calendar = calendar_type(start=start, end=end)
+        _save_calendar(cache_dir, calendar, dict(spec, end=end.isoformat()))
+    return calendar
+
+
+def _load_calendar(cache_dir, calendar_type, spec, end):
     try:
-        factory = self._calendar_factories[name]
-    except KeyError as e:
-        raise InvalidCalendarName(calendar_name=name) from e
-    if name in ["us_futures", "CMES", "XNYS"]:
-        # exchange_calendars has a different default start data
-        # that we need to overwrite in order to pass the legacy tests
-        setattr(factory, "default_start", pd.Timestamp("1950-01-01", tz=pytz.UTC))
-        # kwargs["start"] = pd.Timestamp("1990-01-01", tz="UTC")
-    if name not in ["us_futures", "24/7", "24/5", "CMES"]:
-        # Zipline had default open time of t+1min
-        # factory.open_times = [
-        #     (d, t.replace(minute=t.minute + 1)) for d, t in factory.open_times
-        # ]
-        pass
-    calendar = factory(**kwargs)
-    self._factory_output_cache[name] = (calendar, kwargs)
+        with open(os.path.join(cache_dir, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    cached_end = meta.pop("end", None)
+    if meta != spec or pd.Timestamp(cached_end) < end - pd.DateOffset(months=1):
+        return None
+
+    def load(name):
+        nanos = np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+        return pd.DatetimeIndex(nanos.view("datetime64[ns]")).tz_localize(pytz.UTC)
+
+    try:
+        arrays = {name: load(name) for name in CALENDAR_ARRAYS}
+        calendar = _assemble_calendar(calendar_type, arrays)
+        _check_calendar(calendar, arrays)
+    except Exception as error:
+        logger.debug(f"building the calendar instead of {cache_dir}: {error!r}")
+        return None
     return calendar
 
 
-# Yay! Monkey patching
-ExchangeCalendarDispatcher._fabricate = _fabricate
+def _assemble_calendar(calendar_type, arrays):
+    """What exchange_calendars 3.3's ExchangeCalendar.__init__ leaves behind."""
+    sessions = arrays["sessions"]
+    has_breaks = not arrays["break_starts"].isnull().all()
+
+    calendar = calendar_type.__new__(calendar_type)
+    calendar._opens = arrays["opens"]
+    calendar._break_starts = arrays["break_starts"] if has_breaks else None
+    calendar._break_ends = arrays["break_ends"] if has_breaks else None
+    calendar._closes = arrays["closes"]
+    calendar.schedule = DataFrame(
+        {
+            "market_open": arrays["opens"].tz_localize(None),
+            "break_start": arrays["break_starts"].tz_localize(None),
+            "break_end": arrays["break_ends"].tz_localize(None),
+            "market_close": arrays["closes"].tz_localize(None),
+        },
+        index=sessions,
+        dtype="datetime64[ns]",
+    )
+    calendar._minute_to_session_label_cache = (None, None)
+    for column, attribute in (
+        ("market_open", "market_opens_nanos"),
+        ("break_start", "market_break_starts_nanos"),
+        ("break_end", "market_break_ends_nanos"),
+        ("market_close", "market_closes_nanos"),
+    ):
+        setattr(calendar, attribute, calendar.schedule[column].values.view("int64"))
+    calendar.first_trading_session = sessions[0]
+    calendar.last_trading_session = sessions[-1]
+    calendar._late_opens = arrays["late_opens"]
+    calendar._early_closes = arrays["early_closes"]
+    return calendar
+
+
+def _check_calendar(calendar, arrays):
+    """Raise unless `calendar` answers for its last session as `arrays` say."""
+    session = arrays["sessions"][-1]
+    open_, close = arrays["opens"][-1], arrays["closes"][-1]
+    if not (
+        calendar.first_session == arrays["sessions"][0]
+        and calendar.last_session == session
+        and calendar.session_open(session) == open_
+        and calendar.session_close(session) == close
+        and calendar.minute_to_session_label(open_ + (close - open_) / 2) == session
+    ):
+        raise ValueError("the assembled calendar doesn't match its arrays")
+
+
+def _save_calendar(cache_dir, calendar, meta):
+    schedule = calendar.schedule
+    arrays = {
+        "sessions": schedule.index,
+        "opens": schedule["market_open"],
+        "break_starts": schedule["break_start"],
+        "break_ends": schedule["break_end"],
+        "closes": schedule["market_close"],
+        "late_opens": calendar.late_opens,
+        "early_closes": calendar.early_closes,
+    }
+
+    # write the calendar aside and swap it in so readers never see half of it
+    staging = f"{cache_dir}.{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    for name, values in arrays.items():
+        values = pd.DatetimeIndex(values)
+        if values.tz is not None:
+            values = values.tz_convert(None)
+        nanos = values.values.astype("datetime64[ns]").view("int64")
+        np.save(os.path.join(staging, f"{name}.npy"), nanos)
 
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump(meta, f)
 
-def csvdir_equities(tframes=None, csvdir=None):
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    try:
+        os.replace(staging, cache_dir)
+    except OSError:
+        # another process got there first
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _prebuilt_calendar_factory(name):
+    """
+    A calendar factory for register_calendar_type that serves the default
+    calendar `name` (no start or end asked for) from prebuilt_calendar, so
+    it is only built or loaded once something asks for it. Calendars with
+    other bounds are built as usual, from 1950 unless a start is given.
+    """
+    calendar_type = PREBUILT_CALENDARS[name]
+
+    class PrebuiltCalendarFactory:
+        # zipline's _fabricate patch shifts these opens by a minute, the
+        # calendars returned keep the exchange's
+        open_times = calendar_type.open_times
+
+        def __new__(cls, start=None, end=None, **kwargs):
+            if start is None and end is None and not kwargs:
+                return prebuilt_calendar(name)
+            if start is None:
+                start = CALENDAR_START
+            return calendar_type(start=start, end=end, **kwargs)
+
+    PrebuiltCalendarFactory.__qualname__ = f"PrebuiltCalendarFactory[{name}]"
+    return PrebuiltCalendarFactory
+
+
+for _name in PREBUILT_CALENDARS:
+    # replaces the dispatcher's default factory, nothing is built yet
+    register_calendar_type(_name, _prebuilt_calendar_factory(_name), force=True)
+
+
+def csvdir_equities(
+    tframes=None,
+    csvdir=None,
+    workers=None,
+    incremental=None,
+    memory_budget=None,
+    validate=None,
+):
     """
     Generate an ingest function for custom data bundle
     This function can be used in ~/.zipline/extension.py
@@ -67,6 +284,31 @@ def csvdir_equities(tframes=None, csvdir=None):
         <directory>/<timeframe2>/<symbol1>.csv
         <directory>/<timeframe2>/<symbol2>.csv
         <directory>/<timeframe2>/<symbol3>.csv
+    workers : int, optional, default: CSVDIR_WORKERS environment variable
+        The number of processes used to parse the csv files. With 1 (the
+        default) the files are parsed serially in the ingesting process, as
+        they are when this module isn't importable, see _pool_workers.
+    incremental : bool, optional, default: CSVDIR_INCREMENTAL environment variable
+        Build on the most recent ingestion of the bundle: only rows appended
+        to the csv files since then are parsed, everything else is carried
+        over from that ingestion's bar, asset and adjustment data.
+    memory_budget : int, optional, default: CSVDIR_MEMORY_MB environment variable
+        The bytes (512 MB by default) the minute csv files being read may
+        take up at once. It is shared by all the files in flight, see
+        _file_budget; files bigger than their share are not read whole but
+        streamed to the minute bar writer in chunks of about that size. Such
+        files must already be sorted by date.
+    validate : str, optional, default: CSVDIR_VALIDATE environment variable
+        What to do about bad bars (duplicate dates, missing or non-positive
+        prices, inconsistent OHLC, bars outside the calendar's sessions and
+        sessions missing from daily files): "report" them (the default),
+        "repair" them or "off" to skip the checks. See _BarValidator.
+
+    An optional assets.csv next to the time frame directories adds asset
+    fields per symbol, see read_asset_fields.
+
+    Parsed csv files are cached as .npy columns, see read_symbol_frame. Set
+    the CSVDIR_CACHE environment variable to 0 to always parse the csv.
 
     Returns
     -------
@@ -83,7 +325,9 @@ def csvdir_equities(tframes=None, csvdir=None):
                 '/full/path/to/the/csvdir/directory'))
     """
 
-    return CSVDIRBundle(tframes, csvdir).ingest
+    return CSVDIRBundle(
+        tframes, csvdir, workers, incremental, memory_budget, validate
+    ).ingest
 
 
 class CSVDIRBundle:
@@ -92,9 +336,21 @@ class CSVDIRBundle:
     list of time frames and a path to the csvdir directory
     """
 
-    def __init__(self, tframes=None, csvdir=None):
+    def __init__(
+        self,
+        tframes=None,
+        csvdir=None,
+        workers=None,
+        incremental=None,
+        memory_budget=None,
+        validate=None,
+    ):
         self.tframes = tframes
         self.csvdir = csvdir
+        self.workers = workers
+        self.incremental = incremental
+        self.memory_budget = memory_budget
+        self.validate = validate
 
     def ingest(
         self,
@@ -125,6 +381,10 @@ class CSVDIRBundle:
             output_dir,
             self.tframes,
             self.csvdir,
+            self.workers,
+            self.incremental,
+            self.memory_budget,
+            self.validate,
         )
 
 
@@ -143,6 +403,10 @@ def csvdir_bundle(
     output_dir,
     tframes=None,
     csvdir=None,
+    workers=None,
+    incremental=None,
+    memory_budget=None,
+    validate=None,
 ):
     """
     Build a zipline data bundle from the directory with csv files.
@@ -163,20 +427,28 @@ def csvdir_bundle(
                 "'daily' and 'minute' directories " "not found in '%s'" % csvdir
             )
 
-    divs_splits = {
-        "divs": pd.DataFrame(
-            columns=[
-                "sid",
-                "amount",
-                "ex_date",
-                "record_date",
-                "declared_date",
-                "pay_date",
-            ]
-        ),
-        "splits": pd.DataFrame(columns=["sid", "ratio", "effective_date"]),
-    }
-    for i, tframe in enumerate(tframes):
+    if not workers:
+        workers = int(environ.get("CSVDIR_WORKERS", 1))
+
+    if incremental is None:
+        incremental = environ.get("CSVDIR_INCREMENTAL", "0") not in ("", "0")
+
+    use_cache = environ.get("CSVDIR_CACHE", "1") not in ("", "0")
+
+    if not memory_budget:
+        memory_budget = int(environ.get("CSVDIR_MEMORY_MB", 512)) * 2**20
+
+    if not validate:
+        validate = environ.get("CSVDIR_VALIDATE", "report")
+    if validate not in ("off", "report", "repair"):
+        raise ValueError(f"validate must be off, report or repair, not {validate!r}")
+
+    # output_dir is <zipline data>/<bundle name>/<ingestion timestr>
+    bundle_name = os.path.basename(os.path.dirname(output_dir))
+    timestr = os.path.basename(output_dir)
+
+    all_symbols = {}
+    for tframe in tframes:
         ddir = os.path.join(csvdir, tframe)
 
         symbols = sorted(
@@ -185,41 +457,504 @@ def csvdir_bundle(
         if not symbols:
             raise ValueError("no <symbol>.csv* files found in %s" % ddir)
 
-        dtype = [
-            ("start_date", "datetime64[ns]"),
-            ("end_date", "datetime64[ns]"),
-            ("auto_close_date", "datetime64[ns]"),
-            ("symbol", "object"),
-        ]
-        metadata = pd.DataFrame(empty(len(symbols), dtype=dtype))
+        all_symbols[tframe] = symbols
+
+    previous = None
+    if incremental:
+        previous = _previous_time_frames(
+            csvdir, bundle_name, timestr, all_symbols, calendar, environ
+        )
+        if previous is None:
+            logger.info(f"No usable previous ingestion of {bundle_name}, reading all")
+
+    # per-column lists of arrays, concatenated once all the files are read
+    divs_splits = {
+        "divs": _adjustment_chunks(DIVIDEND_COLUMNS),
+        "splits": _adjustment_chunks(SPLIT_COLUMNS),
+    }
+    manifest = {}
+    asset_fields = read_asset_fields(csvdir)
+    for i, tframe in enumerate(tframes):
+        ddir = os.path.join(csvdir, tframe)
 
         if tframe == "minute":
             writer = minute_bar_writer
         else:
             writer = daily_bar_writer
 
+        if previous:
+            delta = previous[tframe]
+            delta.writer = writer
+            symbols = delta.order(all_symbols[tframe])
+        else:
+            delta = None
+            symbols = all_symbols[tframe]
+
+        metadata = _AssetMetadata(symbols)
+        manifest[tframe] = {}
+
         writer.write(
-            _pricing_iter(ddir, symbols, metadata, divs_splits, show_progress),
+            _pricing_iter(
+                ddir,
+                symbols,
+                metadata,
+                divs_splits,
+                show_progress,
+                workers,
+                delta,
+                manifest[tframe],
+                use_cache,
+                # the daily writer needs each sid's bars in one piece
+                memory_budget if tframe == "minute" else None,
+                (
+                    None
+                    if validate == "off"
+                    else _BarValidator(calendar, tframe, repair=validate == "repair")
+                ),
+            ),
             show_progress=show_progress,
         )
 
         if i == 0:
-            # Hardcode the exchange to "CSVDIR" for all assets and (elsewhere)
-            # register "CSVDIR" to resolve to the NYSE calendar, because these
-            # are all equities and thus can use the NYSE calendar.
-            metadata["exchange"] = "CSVDIR"
+            asset_db_writer.write(equities=metadata.frame(asset_fields))
+            # the sids of the asset db, which the adjustments refer to
+            sids = {symbol: sid for sid, symbol in enumerate(symbols)}
+
+    if previous:
+        reread = set().union(*(delta.reread for delta in previous.values()))
+        _previous_adjustments(divs_splits, next(iter(previous.values())), reread)
+
+    adjustment_writer.write(
+        splits=_adjustment_frame(
+            divs_splits["splits"], SPLIT_COLUMNS, "effective_date", sids
+        ),
+        # the writer computes dividend ratios from the daily closes
+        dividends=(
+            _adjustment_frame(divs_splits["divs"], DIVIDEND_COLUMNS, "ex_date", sids)
+            if "daily" in tframes
+            else None
+        ),
+    )
+
+    _write_manifest(csvdir, bundle_name, timestr, manifest)
+
+
+# columns of assets.csv besides symbol, see read_asset_fields
+ASSET_FIELDS = {
+    "exchange": "object",
+    "asset_name": "object",
+    "first_traded": "datetime64[ns]",
+}
+
+
+def read_asset_fields(csvdir):
+    """
+    Read the optional per symbol asset fields in <csvdir>/assets.csv.
+
+    The file has a symbol column and any of the ASSET_FIELDS columns. Symbols
+    missing from it, or with an empty field, get the default for that field.
+    An exchange other than the default "CSVDIR" must resolve to a calendar,
+    e.g. through register_calendar_alias.
+
+    Parameters
+    ----------
+    csvdir : str
+        The csvdir bundle directory
+
+    Returns
+    -------
+    pd.DataFrame or None
+        The fields indexed by symbol, None if there is no assets.csv
+    """
+    path = os.path.join(csvdir, "assets.csv")
+    if not os.path.isfile(path):
+        return None
+
+    fields = read_csv(path, dtype={"symbol": "object"}).set_index("symbol")
+    unknown = fields.columns.difference(list(ASSET_FIELDS))
+    if len(unknown):
+        raise ValueError(f"unknown columns {list(unknown)} in {path}")
+    if fields.index.duplicated().any():
+        raise ValueError(f"duplicate symbols in {path}")
+    if "first_traded" in fields:
+        fields["first_traded"] = pd.to_datetime(fields["first_traded"])
+    return fields
+
+
+class _AssetMetadata:
+    """
+    Start and end dates of every sid, in arrays filled in as the files are
+    read and turned into the asset db's equities frame once.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = np.array(symbols, dtype=object)
+        self.start_date = np.full(len(symbols), "NaT", dtype="datetime64[ns]")
+        self.end_date = np.full(len(symbols), "NaT", dtype="datetime64[ns]")
+
+    def record(self, sid, start_date, end_date):
+        self.start_date[sid] = _naive_datetime64(start_date)
+        self.end_date[sid] = _naive_datetime64(end_date)
+
+    def frame(self, asset_fields=None):
+        """The equities frame for asset_db_writer.write, sid ordered."""
+        metadata = DataFrame(
+            {
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+                # The auto_close date is the day after the last trade.
+                "auto_close_date": self.end_date + np.timedelta64(1, "D"),
+                "symbol": self.symbols,
+                # Default the exchange to "CSVDIR" and (elsewhere) register
+                # "CSVDIR" to resolve to the NYSE calendar, because these are
+                # all equities and thus can use the NYSE calendar.
+                "exchange": "CSVDIR",
+            }
+        )
+        if asset_fields is None:
+            return metadata
+
+        fields = asset_fields.reindex(self.symbols)
+        for column in fields.columns:
+            values = fields[column].values.astype(ASSET_FIELDS[column])
+            if column in metadata:
+                values = np.where(pd.isnull(values), metadata[column].values, values)
+            metadata[column] = values
+        return metadata
+
+
+def _naive_datetime64(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.to_datetime64()
+
+
+SPLIT_COLUMNS = {
+    "sid": "int64",
+    "ratio": "float64",
+    "effective_date": "datetime64[ns]",
+}
+
+DIVIDEND_COLUMNS = {
+    "sid": "int64",
+    "amount": "float64",
+    "ex_date": "datetime64[ns]",
+    "record_date": "datetime64[ns]",
+    "declared_date": "datetime64[ns]",
+    "pay_date": "datetime64[ns]",
+}
+
+
+def _adjustment_chunks(columns):
+    """
+    Lists to collect the splits or dividends in, one per column but with the
+    symbol of each row instead of its sid, see _adjustment_frame.
+    """
+    return {column: [] for column in ["symbol", *columns] if column != "sid"}
+
+
+def _adjustment_frame(chunks, columns, date_column, sids):
+    """
+    Build the splits or dividends frame from the arrays collected per symbol.
+
+    Columns nothing was collected for (e.g. the dividend pay_date) are NaT.
+    A symbol found in several time frame directories reports its adjustments
+    once per directory, so only the first adjustment of a symbol on a date
+    (`date_column`) is kept. The symbols are then replaced by their `sids`,
+    dropping those without one.
+    """
+    dtypes = {"symbol": "object", **columns}
+    del dtypes["sid"]
+    length = sum(len(chunk) for chunk in chunks["symbol"])
+    frame = pd.DataFrame(
+        {
+            column: (
+                np.concatenate(chunks[column]).astype(dtype, copy=False)
+                if chunks[column]
+                else np.full(length, None, dtype=dtype)
+            )
+            for column, dtype in dtypes.items()
+        }
+    )
+    frame = frame.drop_duplicates(["symbol", date_column])
+    frame.insert(0, "sid", frame.pop("symbol").map(sids))
+    frame = frame[frame["sid"].notnull()]
+    return frame.astype({"sid": "int64"}).reset_index(drop=True)
+
+
+def _read_symbol_csv(path, previous=None, cache=True, memory_budget=None):
+    """
+    Parse one <symbol>.csv, through the cache of read_symbol_frame.
+
+    A file bigger than `memory_budget` bytes isn't read here but left to be
+    streamed, and None is returned for the frame.
+
+    With `previous`, the manifest entry the file got at the last ingestion,
+    only the rows appended since are parsed, provided the file still ends
+    where and how it did then. Otherwise the whole file is read.
+
+    Returns the frame, whether it holds only the appended rows, the file's
+    new manifest state and the seconds it took.
+    """
+    started = time.perf_counter()
+    state = _file_state(path)
+
+    dfr = None
+    if previous is not None:
+        dfr = _read_appended_rows(path, previous, state)
+    appended = dfr is not None
+
+    if not appended:
+        if memory_budget is not None and state["size"] > memory_budget:
+            dfr = None
+        else:
+            dfr = read_symbol_frame(path, cache)
+
+    return dfr, appended, state, time.perf_counter() - started
+
+
+def read_symbol_frame(path, cache=True):
+    """
+    Read a csvdir <symbol>.csv into a frame indexed by its (sorted) dates.
+
+    With `cache`, the parsed columns are saved as .npy files under
+    .cache/<symbol>/ next to the csv, the dates as int64 nanoseconds, and
+    are read back memory mapped instead of parsing the csv again for as long
+    as the csv is unchanged. It is considered unchanged if its size and
+    mtime match, or failing the mtime, a hash of its contents. A cache entry
+    is only written for frames with a date index and numeric columns.
+
+    Other tooling can read csvdir data through this as well.
+    """
+    if cache:
+        stat = os.stat(path)
+        cache_dir = _csv_cache_dir(path)
+        dfr = _load_cached_frame(cache_dir, path, stat)
+        if dfr is not None:
+            return dfr
+
+    # NOTE: read_csv can also read compressed csv files
+    dfr = pd.read_csv(
+        path,
+        parse_dates=[0],
+        infer_datetime_format=True,
+        index_col=0,
+    ).sort_index()
+
+    if cache:
+        try:
+            _save_cached_frame(cache_dir, dfr, stat, _content_hash(path))
+        except OSError as error:
+            # without a writable cache we just parse the csv again next time
+            logger.debug(f"not caching {path}: {error}")
 
-            asset_db_writer.write(equities=metadata)
+    return dfr
 
-        divs_splits["divs"]["sid"] = divs_splits["divs"]["sid"].astype(int)
-        divs_splits["splits"]["sid"] = divs_splits["splits"]["sid"].astype(int)
-        # adjustment_writer.write(
-        #     splits=divs_splits["splits"], dividends=divs_splits["divs"]
-        # )
-        adjustment_writer.write(splits=divs_splits["splits"])
 
+def _csv_cache_dir(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, ".cache", name.split(".csv")[0])
 
-def _pricing_iter(csvdir, symbols, metadata, divs_splits, show_progress):
+
+def _content_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 22), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_cached_frame(cache_dir, path, stat):
+    meta_path = os.path.join(cache_dir, "meta.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta["size"] != stat.st_size:
+        return None
+    if meta["mtime_ns"] != stat.st_mtime_ns:
+        if meta["hash"] != _content_hash(path):
+            return None
+        # touched but not changed, don't hash it again next time
+        meta["mtime_ns"] = stat.st_mtime_ns
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+    def load(name):
+        return np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+
+    index = pd.DatetimeIndex(load("index").view("datetime64[ns]"))
+    if meta["tz"]:
+        index = index.tz_localize("UTC").tz_convert(meta["tz"])
+
+    return pd.DataFrame(
+        {column: load(i) for i, column in enumerate(meta["columns"])},
+        index=index.rename(meta["index_name"]),
+    )
+
+
+def _save_cached_frame(cache_dir, dfr, stat, digest):
+    if not isinstance(dfr.index, pd.DatetimeIndex) or any(
+        dtype.kind not in "biuf" for dtype in dfr.dtypes
+    ):
+        return
+
+    # write the entry aside and swap it in so readers never see half of it
+    staging = f"{cache_dir}.{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    dates = dfr.index.values.astype("datetime64[ns]").view("int64")
+    np.save(os.path.join(staging, "index.npy"), dates)
+    for i, column in enumerate(dfr.columns):
+        np.save(os.path.join(staging, f"{i}.npy"), dfr[column].values)
+
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump(
+            {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": digest,
+                "index_name": dfr.index.name,
+                "tz": str(dfr.index.tz) if dfr.index.tz is not None else None,
+                "columns": [str(column) for column in dfr.columns],
+            },
+            f,
+        )
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(staging, cache_dir)
+
+
+def _read_symbol_task(task):
+    return _read_symbol_csv(*task)
+
+
+def _file_state(path):
+    """Size, mtime and last line of a csv file, as kept in the manifest."""
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        f.seek(max(stat.st_size - 4096, 0))
+        lines = f.read().splitlines(keepends=True)
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "tail": lines[-1].decode("latin-1") if lines else "",
+    }
+
+
+def _read_appended_rows(path, previous, state):
+    """The rows appended to `path` since `previous`, or None if it was rewritten."""
+    offset = previous["size"]
+    tail = previous["tail"].encode("latin-1")
+    if state["size"] < offset or not path.endswith(".csv"):
+        return None
+
+    names = previous["columns"]
+    nothing_appended = pd.DataFrame(
+        columns=names[1:], index=pd.DatetimeIndex([], name=names[0])
+    )
+    with open(path, "rb") as f:
+        f.seek(offset - len(tail))
+        if f.read(len(tail)) != tail:
+            return None
+
+        if state["size"] == offset:
+            return nothing_appended
+
+        dfr = pd.read_csv(
+            f,
+            header=None,
+            names=names,
+            parse_dates=[0],
+            infer_datetime_format=True,
+            index_col=0,
+        ).sort_index()
+
+    if dfr.empty:
+        # only blank lines were appended
+        return nothing_appended
+    if dfr.index[0] <= pd.Timestamp(previous["end_date"]):
+        return None
+    return dfr
+
+
+def _max_in_flight(workers):
+    """The most results _ordered_map's pool of `workers` holds at a time."""
+    return 2 * workers
+
+
+def _file_budget(memory_budget, workers):
+    """
+    The share of `memory_budget` one file read with `workers` processes gets:
+    the parsed frames _ordered_map holds plus the file streamed meanwhile
+    must fit in the budget together.
+    """
+    if workers <= 1:
+        # the next file is read only once the previous one is written
+        return memory_budget
+    return memory_budget // (_max_in_flight(workers) + 1)
+
+
+def _pool_workers(func, workers):
+    """
+    `workers`, or 1 if `func` can't be sent to a worker process.
+
+    zipline loads ~/.zipline/extension.py with exec into a bare namespace,
+    not as an importable module, so the functions defined in it can't be
+    pickled by name and the files are parsed serially instead.
+    """
+    if workers <= 1:
+        return workers
+    try:
+        pickle.dumps(func)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        logger.warning(
+            f"{func.__name__} can't be pickled where this module was loaded "
+            f"from, parsing serially instead of with {workers} workers"
+        )
+        return 1
+    return workers
+
+
+def _ordered_map(func, items, workers):
+    """
+    Like map(func, items) but run on a pool of `workers` processes.
+
+    Results come back in the order of `items`, and at most two tasks per
+    worker are in flight so parsed frames don't pile up in memory while the
+    bar writer is busy.
+    """
+    if workers <= 1:
+        yield from map(func, items)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= _max_in_flight(workers):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _pricing_iter(
+    csvdir,
+    symbols,
+    metadata,
+    divs_splits,
+    show_progress,
+    workers=1,
+    delta=None,
+    manifest=None,
+    cache=True,
+    memory_budget=None,
+    validator=None,
+):
     with maybe_show_progress(
         symbols, show_progress, label="Loading custom pricing data: "
     ) as it:
@@ -227,58 +962,471 @@ def _pricing_iter(csvdir, symbols, metadata, divs_splits, show_progress):
         files = os.listdir(csvdir)
         file_names = set(f.split('.')[0] for f in files)
 
-        for sid, symbol in enumerate(it):
-            logger.debug(f"{symbol}: sid {sid}")
-
+        for symbol in symbols:
             if symbol not in file_names:
                 raise ValueError(f"{symbol}.csv file is not in {csvdir}")
 
-            # NOTE: read_csv can also read compressed csv files
-            dfr = pd.read_csv(
-                os.path.join(csvdir, f'{symbol}.csv'),
-                parse_dates=[0],
-                infer_datetime_format=True,
-                index_col=0,
-            ).sort_index()
-
-            start_date = dfr.index[0]
-            end_date = dfr.index[-1]
-
-            # The auto_close date is the day after the last trade.
-            ac_date = end_date + pd.Timedelta(days=1)
-            metadata.iloc[sid] = start_date, end_date, ac_date, symbol
-
-            if "split" in dfr.columns:
-                tmp = 1.0 / dfr[dfr["split"] != 1.0]["split"]
-                split = pd.DataFrame(
-                    data=tmp.index.tolist(), columns=["effective_date"]
+        paths = [os.path.join(csvdir, f'{symbol}.csv') for symbol in symbols]
+        workers = _pool_workers(_read_symbol_task, workers)
+        if memory_budget is not None:
+            memory_budget = _file_budget(memory_budget, workers)
+        tasks = [
+            (path, delta.entry(symbol) if delta else None, cache, memory_budget)
+            for path, symbol in zip(paths, symbols)
+        ]
+        parsed = _ordered_map(_read_symbol_task, tasks, workers)
+
+        started = time.perf_counter()
+        parse_seconds = 0.0
+        rows = 0
+
+        for sid, (symbol, parsed_csv) in enumerate(zip(it, parsed)):
+            dfr, appended, state, seconds = parsed_csv
+            logger.debug(f"{symbol}: sid {sid}")
+            parse_seconds += seconds
+
+            if dfr is None:
+                # too big to hold at once, hand it to the writer chunk by chunk
+                start_date = None
+                for chunk, seconds in _stream_symbol_csv(paths[sid], memory_budget):
+                    parse_seconds += seconds
+                    rows += len(chunk)
+                    if validator:
+                        chunk = validator.check(symbol, chunk)
+                        if not len(chunk):
+                            continue
+                    if start_date is None:
+                        start_date = chunk.index[0]
+                        columns = [chunk.index.name] + list(chunk.columns)
+                    end_date = chunk.index[-1]
+                    _collect_adjustments(divs_splits, symbol, chunk)
+                    yield sid, chunk
+
+                if start_date is None:
+                    raise ValueError(f"no valid bars in {paths[sid]}")
+                if delta:
+                    delta.reread.add(symbol)
+                bars = None
+            else:
+                rows += len(dfr)
+                if validator and len(dfr):
+                    dfr = validator.check(symbol, dfr)
+                    if not (appended or len(dfr)):
+                        raise ValueError(f"no valid bars in {paths[sid]}")
+                columns = [dfr.index.name] + list(dfr.columns)
+                _collect_adjustments(divs_splits, symbol, dfr)
+
+                if appended:
+                    bars = delta.extend(sid, symbol, dfr)
+                    start_date = pd.Timestamp(delta.entry(symbol)["start_date"])
+                    end_date = (
+                        dfr.index[-1]
+                        if len(dfr)
+                        else pd.Timestamp(delta.entry(symbol)["end_date"])
+                    )
+                else:
+                    if delta:
+                        delta.reread.add(symbol)
+                    bars = dfr
+                    start_date = dfr.index[0]
+                    end_date = dfr.index[-1]
+
+            if manifest is not None:
+                manifest[symbol] = dict(
+                    state,
+                    sid=sid,
+                    columns=columns,
+                    start_date=start_date.isoformat(),
+                    end_date=end_date.isoformat(),
                 )
-                split["ratio"] = tmp.tolist()
-                split["sid"] = sid
 
-                splits = divs_splits["splits"]
-                index = pd.Index(
-                    range(splits.shape[0], splits.shape[0] + split.shape[0])
+            metadata.record(sid, start_date, end_date)
+
+            if bars is not None and len(bars):
+                yield sid, bars
+
+        _log_parse_throughput(
+            csvdir, len(symbols), rows, parse_seconds, time.perf_counter() - started
+        )
+        if validator:
+            validator.log_report(csvdir)
+
+
+def _collect_adjustments(divs_splits, symbol, dfr):
+    if "split" in dfr.columns:
+        split = dfr["split"]
+        split = split[split != 1.0]
+        splits = divs_splits["splits"]
+        splits["symbol"].append(np.full(len(split), symbol, dtype=object))
+        splits["ratio"].append(1.0 / split.values)
+        splits["effective_date"].append(_session_dates(split.index))
+
+    if "dividend" in dfr.columns:
+        dividend = dfr["dividend"]
+        dividend = dividend[dividend != 0.0]
+        divs = divs_splits["divs"]
+        divs["symbol"].append(np.full(len(dividend), symbol, dtype=object))
+        divs["amount"].append(dividend.values)
+        divs["ex_date"].append(_session_dates(dividend.index))
+
+
+def _session_dates(index):
+    """The dates of the bars at `index`, minute bars included, as naive midnights."""
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.normalize().values
+
+
+# explicit dtypes for the csv columns we know, so streamed chunks agree
+BAR_DTYPES = {
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+    "dividend": "float64",
+    "split": "float64",
+}
+
+
+def _stream_symbol_csv(path, memory_budget):
+    """
+    Read <symbol>.csv in chunks of about `memory_budget` bytes, yielding each
+    with the seconds it took to parse.
+
+    A streamed file can't be sorted, so its dates have to increase already;
+    that is checked within and across chunks.
+    """
+    with open(path, "rb") as f:
+        sample = f.read(1 << 16)
+    header = sample.split(b"\n", 1)[0].decode().strip().split(",")
+    # the raw text of a row plus its parsed float64 columns
+    row_bytes = len(sample) / max(sample.count(b"\n"), 1) + 8 * len(header)
+    chunksize = max(int(memory_budget // row_bytes), 1)
+
+    reader = pd.read_csv(
+        path,
+        parse_dates=[0],
+        infer_datetime_format=True,
+        index_col=0,
+        dtype={column: BAR_DTYPES[column] for column in header if column in BAR_DTYPES},
+        chunksize=chunksize,
+    )
+
+    last = None
+    with reader:
+        while True:
+            started = time.perf_counter()
+            chunk = next(reader, None)
+            if chunk is None:
+                return
+            seconds = time.perf_counter() - started
+
+            index = chunk.index
+            if (
+                not (index.is_monotonic_increasing and index.is_unique)
+                or last is not None
+                and index[0] <= last
+            ):
+                raise ValueError(
+                    f"{path} is not sorted by date around {index[0]}. Files "
+                    f"over the memory budget are streamed and can't be sorted."
+                )
+            last = index[-1]
+
+            yield chunk, seconds
+
+
+class _BarValidator:
+    """
+    Vectorized checks of the bars of one time frame against the calendar.
+
+    check() counts, per symbol, the bars that
+      - repeat an earlier date (duplicate),
+      - have a missing or non-positive price (bad_price),
+      - have a high below or a low above the other prices (inconsistent_ohlc),
+      - fall outside the calendar's sessions, or for minute bars outside
+        [market open, market close] of their session (outside_session),
+    and for daily bars the sessions between a symbol's first and last bar
+    that have no bar (missing_session).
+
+    With repair, duplicates keep their last bar, bars outside the sessions
+    are dropped, and bad or inconsistent bars as well as missing daily
+    sessions are filled flat with the previous close and no volume (bad
+    bars before any good one are dropped).
+    """
+
+    CHECKS = (
+        "duplicate",
+        "bad_price",
+        "inconsistent_ohlc",
+        "outside_session",
+        "missing_session",
+    )
+
+    def __init__(self, calendar, tframe, repair=False):
+        self.tframe = tframe
+        self.repair = repair
+
+        schedule = calendar.schedule
+        sessions = schedule.index
+        if sessions.tz is not None:
+            sessions = sessions.tz_convert(None)
+        self.sessions = sessions
+        self.opens = schedule["market_open"].values.astype("datetime64[ns]")
+        self.closes = schedule["market_close"].values.astype("datetime64[ns]")
+
+        self.counts = dict.fromkeys(self.CHECKS, 0)
+        self.symbols = {check: [] for check in self.CHECKS}
+
+    def check(self, symbol, dfr):
+        """`dfr` repaired when repairing, otherwise as it is."""
+        index = dfr.index
+        if index.tz is not None:
+            index = index.tz_convert(None)
+
+        found = {"duplicate": index.duplicated(keep="last")}
+
+        prices = dfr[dfr.columns.intersection(["open", "high", "low", "close"])]
+        values = prices.values
+        found["bad_price"] = ~(values > 0).all(axis=1)
+        if prices.shape[1] == 4:
+            high = prices["high"].values
+            low = prices["low"].values
+            with np.errstate(invalid="ignore"):
+                found["inconsistent_ohlc"] = (high < np.nanmax(values, axis=1)) | (
+                    low > np.nanmin(values, axis=1)
                 )
-                split.set_index(index, inplace=True)
-                divs_splits["splits"] = splits.append(split)
+        else:
+            found["inconsistent_ohlc"] = np.zeros(len(dfr), dtype=bool)
+
+        positions = self.sessions.get_indexer(index.normalize())
+        outside = positions < 0
+        if self.tframe == "minute":
+            minutes = index.values
+            in_session = positions[~outside]
+            outside[~outside] = (minutes[~outside] < self.opens[in_session]) | (
+                minutes[~outside] > self.closes[in_session]
+            )
+        found["outside_session"] = outside
+
+        missing = 0
+        if self.tframe != "minute" and (~outside).any():
+            first, last = positions[~outside].min(), positions[~outside].max()
+            missing = last - first + 1 - len(np.unique(positions[~outside]))
+
+        for check, mask in found.items():
+            self._count(symbol, check, int(mask.sum()))
+        self._count(symbol, "missing_session", int(missing))
+
+        if not self.repair:
+            return dfr
+
+        keep = ~(found["duplicate"] | found["outside_session"])
+        bad = (found["bad_price"] | found["inconsistent_ohlc"])[keep]
+        dfr = dfr[keep]
+        if not (bad.any() or missing):
+            return dfr
+
+        dfr = dfr.copy()
+        dfr.loc[bad, prices.columns] = np.nan
+        if "volume" in dfr:
+            dfr.loc[bad, "volume"] = 0
+        if missing:
+            sessions = self.sessions[first : last + 1]
+            if dfr.index.tz is not None:
+                sessions = sessions.tz_localize(dfr.index.tz)
+            dfr = dfr.reindex(sessions.rename(dfr.index.name))
+        return self._fill(dfr)
+
+    def _fill(self, dfr):
+        """Fill the bars without prices flat at the previous close."""
+        if "close" in dfr:
+            close = dfr["close"].ffill()
+            dfr["close"] = close
+            for column in dfr.columns.intersection(["open", "high", "low"]):
+                dfr[column] = dfr[column].fillna(close)
+        else:
+            dfr = dfr.ffill()
+        fills = {"volume": 0.0, "split": 1.0, "dividend": 0.0}
+        dfr = dfr.fillna({k: v for k, v in fills.items() if k in dfr})
+        # nothing to fill from before the first good bar
+        return dfr.dropna(subset=dfr.columns.intersection(["close"]))
 
-            if "dividend" in dfr.columns:
-                # ex_date   amount  sid record_date declared_date pay_date
-                tmp = dfr[dfr["dividend"] != 0.0]["dividend"]
-                div = pd.DataFrame(data=tmp.index.tolist(), columns=["ex_date"])
-                div["record_date"] = pd.NaT
-                div["declared_date"] = pd.NaT
-                div["pay_date"] = pd.NaT
-                div["amount"] = tmp.tolist()
-                div["sid"] = sid
+    def _count(self, symbol, check, count):
+        if count:
+            self.counts[check] += count
+            self.symbols[check].append((count, symbol))
 
-                divs = divs_splits["divs"]
-                ind = pd.Index(range(divs.shape[0], divs.shape[0] + div.shape[0]))
-                div.set_index(ind, inplace=True)
-                divs_splits["divs"] = divs.append(div)
+    def log_report(self, csvdir):
+        action = "repaired" if self.repair else "left as they are"
+        if not any(self.counts.values()):
+            logger.info(f"All bars in {csvdir} passed validation")
+            return
 
-            yield sid, dfr
+        logger.info(f"Bars in {csvdir} that failed validation ({action}):")
+        for check in self.CHECKS:
+            if not self.counts[check]:
+                continue
+            worst = sorted(self.symbols[check], reverse=True)[:10]
+            logger.info(
+                f"  {check}: {self.counts[check]} in "
+                f"{len(self.symbols[check])} symbols, most in "
+                + ", ".join(f"{symbol} ({count})" for count, symbol in worst)
+            )
+
+
+def _log_parse_throughput(csvdir, files, rows, parse_seconds, wall_seconds):
+    # parse_seconds is summed over the workers, wall_seconds includes writing
+    parse_seconds = max(parse_seconds, 1e-9)
+    logger.info(
+        f"Loaded {files} files ({rows} rows) from {csvdir} in {wall_seconds:.1f}s, "
+        f"{files / max(wall_seconds, 1e-9):.1f} files/s. Parsing took "
+        f"{1000 * parse_seconds / max(files, 1):.1f} ms per file, "
+        f"{rows / parse_seconds:,.0f} rows/s per worker"
+    )
+
+
+def _manifest_path(csvdir, bundle_name, timestr):
+    return os.path.join(csvdir, ".ingest", bundle_name, f"{timestr}.json")
+
+
+def _write_manifest(csvdir, bundle_name, timestr, manifest):
+    path = _manifest_path(csvdir, bundle_name, timestr)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+
+def _previous_time_frames(
+    csvdir, bundle_name, current_timestr, all_symbols, calendar, environ
+):
+    """
+    A _PreviousTimeFrame per time frame of the most recent ingestion of
+    `bundle_name` before the running one (`current_timestr`) that has a
+    manifest, or None if it can't be built on: there is no such ingestion or
+    a csv file it was built from has gone.
+
+    zipline creates the directory of the running ingestion before calling
+    the ingest function, so it is the newest one listed; it has no manifest
+    yet and is skipped.
+    """
+    for ingestion in bundles.ingestions_for_bundle(bundle_name, environ=environ):
+        timestr = bundles.to_bundle_ingest_dirname(ingestion)
+        path = _manifest_path(csvdir, bundle_name, timestr)
+        if timestr != current_timestr and os.path.exists(path):
+            break
+    else:
+        return None
+
+    with open(path) as f:
+        manifest = json.load(f)
+
+    previous = {}
+    for tframe, symbols in all_symbols.items():
+        entries = manifest.get(tframe)
+        if not entries or not set(entries).issubset(symbols):
+            return None
+        previous[tframe] = _PreviousTimeFrame(
+            bundle_name, timestr, tframe, entries, calendar, environ
+        )
+    return previous
+
+
+def _previous_adjustments(divs_splits, previous, reread):
+    """
+    Add the splits and dividends of the previous ingestion to `divs_splits`,
+    except those of the symbols in `reread`, which were collected afresh.
+    """
+    path = previous.path(bundles.adjustment_db_relative)
+    with sqlite3.connect(path) as conn:
+        frames = {
+            "splits": pd.read_sql("SELECT * FROM splits", conn),
+            "divs": pd.read_sql("SELECT * FROM dividend_payouts", conn),
+        }
+
+    symbols = {entry["sid"]: symbol for symbol, entry in previous.entries.items()}
+    for key, columns in (("splits", SPLIT_COLUMNS), ("divs", DIVIDEND_COLUMNS)):
+        frame = frames[key]
+        symbol = frame["sid"].map(symbols)
+        keep = symbol.notnull() & ~symbol.isin(reread)
+        frame = frame[keep]
+        divs_splits[key]["symbol"].append(symbol[keep].values.astype(object))
+        for column, dtype in columns.items():
+            if column == "sid":
+                continue
+            values = frame[column].values
+            if dtype.startswith("datetime64"):
+                # the adjustment db keeps dates as seconds since the epoch
+                values = values.astype("datetime64[s]")
+            divs_splits[key][column].append(values.astype(dtype))
+
+
+class _PreviousTimeFrame:
+    """
+    What the previous ingestion holds for one time frame directory, used to
+    extend its bars with the rows appended to the csv files since.
+
+    Minute bars are extended in place by copying the previous ctable of the
+    sid before the writer appends to it; the daily writer can only write
+    whole tables, so the previous daily bars are read back and prefixed.
+    """
+
+    def __init__(self, bundle_name, timestr, tframe, entries, calendar, environ):
+        self.bundle_name = bundle_name
+        self.timestr = timestr
+        self.tframe = tframe
+        self.entries = entries
+        self.calendar = calendar
+        self.environ = environ
+        # set to the bar writer of this time frame before ingesting it
+        self.writer = None
+        # symbols whose csv had to be read in full
+        self.reread = set()
+        self._daily_reader = None
+
+    def path(self, relative):
+        return pth.data_path(
+            list(relative(self.bundle_name, self.timestr)), environ=self.environ
+        )
+
+    def order(self, symbols):
+        """`symbols` in sid order: previous sids first, new symbols after."""
+        known = sorted(self.entries, key=lambda symbol: self.entries[symbol]["sid"])
+        return known + sorted(set(symbols).difference(self.entries))
+
+    def entry(self, symbol):
+        return self.entries.get(symbol)
+
+    def extend(self, sid, symbol, dfr):
+        """The bars to write for `sid` given the rows appended to its csv."""
+        if self.tframe == "minute":
+            source = self.path(bundles.minute_equity_relative)
+            destination = self.writer.sidpath(sid)
+            # sidpath is <rootdir>/<xx>/<xx>/<sid>.bcolz
+            source = os.path.join(source, *destination.split(os.sep)[-3:])
+            if os.path.isdir(source):
+                shutil.copytree(source, destination)
+            return dfr
+
+        entry = self.entries[symbol]
+        if self._daily_reader is None:
+            self._daily_reader = BcolzDailyBarReader(
+                self.path(bundles.daily_equity_relative)
+            )
+        start = pd.Timestamp(entry["start_date"], tz="UTC")
+        end = pd.Timestamp(entry["end_date"], tz="UTC")
+        columns = ["open", "high", "low", "close", "volume"]
+        arrays = self._daily_reader.load_raw_arrays(columns, start, end, [sid])
+        index = self.calendar.sessions_in_range(start, end).tz_convert(None)
+        # prices the daily bars store as 0 are read back as NaN
+        previous = pd.DataFrame(
+            {column: array[:, 0] for column, array in zip(columns, arrays)},
+            index=index.rename(dfr.index.name),
+        ).fillna(0)
+        if not len(dfr):
+            return previous
+        return pd.concat([previous, dfr[dfr.columns.intersection(columns)]])
 
 
 register(
@@ -306,6 +1454,8 @@ register(
     csvdir_equities(
         ['minute', 'daily'],
         str(pathlib.Path.home() / '.zipline/csv/tiingo'),
+        # a pool needs this module importable, see _pool_workers
+        workers=1,
     ),
     calendar_name='NYSE',  # US equities
     minutes_per_day=391,
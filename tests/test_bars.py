@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from algos.bars import bar_starts, last_valid, load_bar_window, resample_minutes
+
+
+def session_minutes(days, minutes_in_day):
+    """The first ``minutes_in_day`` minutes after 9:31 New York on each day."""
+    return pd.DatetimeIndex(
+        np.concatenate(
+            [
+                pd.date_range(f'{day} 09:31', periods=minutes_in_day, freq='min')
+                for day in days
+            ]
+        )
+    ).tz_localize('America/New_York')
+
+
+def test_bar_starts_restart_every_session():
+    minutes = session_minutes(['2021-03-01', '2021-03-02'], 7)
+    np.testing.assert_array_equal(bar_starts(minutes, 3), [0, 3, 6, 7, 10, 13])
+
+
+def test_bar_starts_in_utc():
+    # 19:55 New York is after midnight UTC, still the same session
+    minutes = pd.date_range('2021-03-01 19:55', periods=10, freq='min')
+    minutes = minutes.tz_localize('America/New_York').tz_convert('UTC')
+    np.testing.assert_array_equal(bar_starts(minutes, 5), [0, 5])
+
+
+@pytest.fixture
+def values():
+    return np.array(
+        [
+            [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+            [np.nan, 2.0, np.nan, np.nan, np.nan, 6.0, np.nan],
+        ]
+    )
+
+
+STARTS = np.array([0, 3, 6])
+
+
+@pytest.mark.parametrize(
+    'how, expected',
+    [
+        ('first', [[1, 4, 7], [2, 6, np.nan]]),
+        ('last', [[3, 6, 7], [2, 6, np.nan]]),
+        ('max', [[3, 6, 7], [2, 6, np.nan]]),
+        ('min', [[1, 4, 7], [2, 6, np.nan]]),
+        ('sum', [[6, 15, 7], [2, 6, 0]]),
+    ],
+)
+def test_resample_minutes(values, how, expected):
+    np.testing.assert_array_equal(resample_minutes(values, STARTS, how), expected)
+
+
+def test_resample_minutes_keeps_the_dtype(values):
+    bars = resample_minutes(values.astype(np.float32), STARTS, 'last')
+    assert bars.dtype == np.float32
+
+
+def test_resample_minutes_matches_pandas():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(4, 390))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    minutes = session_minutes(['2021-03-01'], 390)
+    starts = bar_starts(minutes, 15)
+    frame = pd.DataFrame(values.T, index=minutes)
+    for how in ('first', 'last', 'max', 'min', 'sum'):
+        expected = getattr(frame.resample('15min', origin='start'), how)()
+        np.testing.assert_allclose(
+            resample_minutes(values, starts, how), expected.values.T
+        )
+
+
+def test_resample_minutes_unknown_reduction(values):
+    with pytest.raises(ValueError):
+        resample_minutes(values, STARTS, 'mean')
+
+
+def test_last_valid():
+    values = np.array(
+        [
+            [1.0, np.nan, 2.0, 3.0],
+            [np.nan, np.nan, np.nan, 1.0],
+            [1.0, 2.0, np.nan, np.nan],
+        ]
+    )
+    mask, matrix = last_valid(values, 2)
+    np.testing.assert_array_equal(mask, [True, False, True])
+    np.testing.assert_array_equal(matrix, [[2.0, 3.0], [1.0, 2.0]])
+
+
+def test_load_bar_window():
+    minutes = session_minutes(['2021-03-01', '2021-03-02'], 10)
+    frame = pd.DataFrame(
+        {'a': np.arange(20.0), 'b': np.arange(20.0), 'c': np.arange(20.0)},
+        index=minutes,
+    )
+    frame.loc[minutes[:3], 'b'] = np.nan
+    frame.loc[minutes[12:], 'c'] = np.nan
+    calls = []
+
+    def history(assets, field, bar_count):
+        calls.append((assets, field, bar_count))
+        return frame
+
+    assets, bars = load_bar_window(
+        None, ['a', 'b', 'c'], 2, 5, minutes_in_day=10, history=history
+    )
+    assert calls == [(['a', 'b', 'c'], 'open', 20)]
+    # 'b' opens its first bar late, 'c' has only 3 of the 4 bars
+    assert assets == ['a', 'b']
+    assert bars.dtype == np.float32
+    np.testing.assert_array_equal(bars, [[0, 5, 10, 15], [3, 5, 10, 15]])
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from algos.executor import ScoringExecutor, linregress_rows, map_rows
+from algos.regression import linregress_columns
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (300, 50)), axis=1))
+
+
+def test_linregress_rows(prices):
+    np.testing.assert_array_equal(
+        linregress_rows(prices), np.stack(linregress_columns(prices.T))
+    )
+
+
+@pytest.mark.parametrize('kind', ['serial', 'thread', 'process'])
+def test_scores_match_inline(prices, kind):
+    executor = ScoringExecutor(kind, workers=3, min_rows=64)
+    try:
+        np.testing.assert_allclose(
+            executor.map(linregress_rows, prices), linregress_rows(prices)
+        )
+        # too few rows to split
+        np.testing.assert_allclose(
+            executor.map(linregress_rows, prices[:100]), linregress_rows(prices[:100])
+        )
+    finally:
+        executor.close()
+
+
+def test_map_rows_without_an_executor(prices):
+    np.testing.assert_array_equal(
+        map_rows(linregress_rows, prices), linregress_rows(prices)
+    )
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        ScoringExecutor('cluster')
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+pytest.importorskip('zipline')
+
+from algos.factors import (  # noqa: E402
+    ClenowMomentum,
+    ModReturns,
+    MomentumQuality,
+    Quality,
+    RollingMomentumQuality,
+    TrendRegression,
+)
+from algos.regression import RollingLinregress  # noqa: E402
+
+WINDOW = 40
+
+
+@pytest.fixture
+def close():
+    rng = np.random.default_rng(0)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (WINDOW, 6)), axis=0))
+
+
+def compute(factor, close, today=None, **params):
+    """``factor.compute`` over ``close`` with its params, overridden by ``params``."""
+    assets = np.arange(close.shape[1])
+    if isinstance(factor.outputs, (list, tuple)):
+        out = np.recarray(len(assets), dtype=[(name, 'f8') for name in factor.outputs])
+    else:
+        out = np.empty(len(assets))
+    factor.compute(today, assets, out, close, **dict(factor.params, **params))
+    return out
+
+
+def scipy_columns(close):
+    x = np.arange(len(close))
+    return [stats.linregress(x, column) for column in close.T]
+
+
+def test_momentum_quality(close):
+    factor = MomentumQuality(window_length=WINDOW)
+    expected = [fit.slope * fit.rvalue**2 for fit in scipy_columns(close)]
+    np.testing.assert_allclose(compute(factor, close), expected, rtol=1e-10)
+
+    returns = (close[-1] - close[0]) / close[0]
+    r_value = np.array([fit.rvalue for fit in scipy_columns(close)])
+    np.testing.assert_allclose(
+        compute(factor, close, momentum='returns', combine='sum', r_power=1),
+        returns + r_value,
+        rtol=1e-10,
+    )
+    with pytest.raises(ValueError):
+        compute(factor, close, combine='ratio')
+
+
+def test_momentum_quality_skips_the_last_sessions(close):
+    factor = MomentumQuality(window_length=WINDOW)
+    expected = [fit.slope * fit.rvalue**2 for fit in scipy_columns(close[:-5])]
+    np.testing.assert_allclose(compute(factor, close, skip=5), expected, rtol=1e-10)
+
+
+def test_quality_with_missing_closes(close):
+    close[:10, 0] = np.nan
+    factor = Quality(window_length=WINDOW)
+    assert np.isnan(compute(factor, close)[0])
+    x = np.arange(10, WINDOW)
+    np.testing.assert_allclose(
+        compute(factor, close, min_obs=30)[0],
+        stats.linregress(x, close[10:, 0]).rvalue,
+        rtol=1e-10,
+    )
+
+
+def test_clenow_momentum(close):
+    close[5, 1] = 0.0
+    factor = ClenowMomentum(window_length=WINDOW, precision='float64')
+    fits = scipy_columns(np.log(close[:, 2:]))
+    expected = [np.expm1(fit.slope * 250) * 100 * fit.rvalue**2 for fit in fits]
+    out = compute(factor, close)
+    # a non-positive close is missing
+    assert np.isnan(out[1])
+    np.testing.assert_allclose(out[2:], expected, rtol=1e-10)
+    np.testing.assert_allclose(
+        compute(factor, close, precision='float32')[2:], expected, rtol=1e-3
+    )
+
+
+def test_trend_regression(close):
+    out = compute(TrendRegression(window_length=WINDOW), close)
+    fits = scipy_columns(close)
+    np.testing.assert_allclose(out.returns, (close[-1] - close[0]) / close[0])
+    np.testing.assert_allclose(out.slope, [fit.slope for fit in fits], rtol=1e-10)
+    np.testing.assert_allclose(
+        out.intercept, [fit.intercept for fit in fits], rtol=1e-10
+    )
+    np.testing.assert_allclose(out.r_value, [fit.rvalue for fit in fits], rtol=1e-10)
+    np.testing.assert_allclose(out.r_squared, out.r_value**2)
+
+
+def test_mod_returns(close):
+    out = compute(ModReturns(window_length=WINDOW), close)
+    np.testing.assert_allclose(out, (close[-21] - close[0]) / close[0])
+
+
+def test_rolling_momentum_quality(close):
+    sessions = pd.bdate_range('2021-01-04', periods=3, tz='UTC')
+    rng = np.random.default_rng(1)
+    history = np.vstack([close, close[-1] * (1 + rng.normal(0, 0.02, (2, 6)))])
+
+    factor = RollingMomentumQuality(window_length=WINDOW)
+    factor._rolling = RollingLinregress(WINDOW, sessions)
+    expected = MomentumQuality(window_length=WINDOW)
+    for day in range(3):
+        window = history[day : day + WINDOW]
+        np.testing.assert_allclose(
+            compute(factor, window, today=sessions[day]),
+            compute(expected, window),
+            rtol=1e-9,
+        )
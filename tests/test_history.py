@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from algos.history import MinuteHistoryCache, RingBuffer
+
+
+class Calendar:
+    def __init__(self, minutes):
+        self.minutes = minutes
+
+    def minutes_window(self, dt, count):
+        end = self.minutes.get_loc(dt) + 1
+        return self.minutes[end + count : end]
+
+
+class Data:
+    """``data.history`` over a (minutes x assets) frame, counting the minutes read."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.current_dt = None
+        self.fetched = 0
+
+    def history(self, assets, field, bar_count, frequency):
+        end = self.frame.index.get_loc(self.current_dt) + 1
+        self.fetched += bar_count * len(assets)
+        return self.frame.iloc[end - bar_count : end][assets]
+
+
+@pytest.fixture
+def data():
+    minutes = pd.date_range('2021-03-01 14:31', periods=200, freq='min', tz='UTC')
+    rng = np.random.default_rng(0)
+    values = rng.normal(100, 1, (len(minutes), 4))
+    values[50:60, 1] = np.nan
+    return Data(pd.DataFrame(values, index=minutes, columns=list('abcd')))
+
+
+@pytest.fixture
+def cache(data):
+    return MinuteHistoryCache(Calendar(data.frame.index), overlap=5)
+
+
+def read(cache, data, at, assets=('a', 'b', 'c'), bar_count=60):
+    data.current_dt = data.frame.index[at]
+    window = cache.history(data, list(assets), 'price', bar_count)
+    expected = data.frame.iloc[at + 1 - bar_count : at + 1][list(assets)]
+    pd.testing.assert_frame_equal(window, expected, check_freq=False)
+    return window
+
+
+def test_ring_buffer():
+    buffer = RingBuffer(np.arange(5.0), end=4)
+    buffer.extend([5.0, 6.0], end=6)
+    np.testing.assert_array_equal(buffer.tail(5), [2, 3, 4, 5, 6])
+    np.testing.assert_array_equal(buffer.tail(2), [5, 6])
+    assert buffer.end == 6
+
+
+def test_slides_forward(cache, data):
+    read(cache, data, 80)
+    assert data.fetched == 3 * 60
+    data.fetched = 0
+    read(cache, data, 90)
+    # the 10 new minutes plus the overlap
+    assert data.fetched == 3 * (10 + 5)
+    data.fetched = 0
+    read(cache, data, 90)
+    assert data.fetched == 0
+
+
+def test_refetches_an_adjusted_window(cache, data):
+    read(cache, data, 80)
+    data.frame.iloc[:85, 0] /= 2
+    data.fetched = 0
+    read(cache, data, 90)
+    assert data.fetched == 3 * 15 + 60
+
+
+def test_refetches_windows_too_old_to_slide(cache, data):
+    read(cache, data, 70)
+    data.fetched = 0
+    read(cache, data, 190)
+    assert data.fetched == 3 * 60
+
+
+def test_new_assets_and_longer_windows(cache, data):
+    read(cache, data, 80, assets='ab')
+    read(cache, data, 85, assets='bcd')
+    read(cache, data, 90, assets='ad', bar_count=80)
+
+
+def test_evicts_least_recently_used(data):
+    # room for two windows of 60 float64s
+    cache = MinuteHistoryCache(Calendar(data.frame.index), max_bytes=2 * 60 * 8)
+    read(cache, data, 80, assets='a')
+    read(cache, data, 80, assets='bc')
+    assert list(cache._buffers) == [('b', 'price', '1m'), ('c', 'price', '1m')]
+    read(cache, data, 81, assets='b')
+    read(cache, data, 81, assets='d')
+    assert list(cache._buffers) == [('b', 'price', '1m'), ('d', 'price', '1m')]
+    assert cache._nbytes == 2 * 60 * 8
+
+
+def test_retain(cache, data):
+    read(cache, data, 80, assets='abcd')
+    cache.retain(['b', 'd', 'e'])
+    assert list(cache._buffers) == [('b', 'price', '1m'), ('d', 'price', '1m')]
+    assert cache._nbytes == 2 * 60 * 8
+    data.fetched = 0
+    read(cache, data, 80, assets='abd')
+    assert data.fetched == 60
+
+
+def test_daily_frequency_goes_to_data(cache, data):
+    data.current_dt = data.frame.index[80]
+    cache.history(data, ['a'], 'price', 3, '1d')
+    assert not cache._buffers
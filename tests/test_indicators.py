@@ -0,0 +1,228 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from algos.indicators import StreamingIndicators, bbands, ema, rsi
+
+
+def first_valid(column):
+    valid = [i for i, value in enumerate(column) if not math.isnan(value)]
+    return valid[0] if valid else len(column)
+
+
+def reference_ema(column, timeperiod):
+    out = [math.nan] * len(column)
+    first = first_valid(column)
+    start = first + timeperiod - 1
+    if start >= len(column):
+        return out
+    prev = sum(column[first : start + 1]) / timeperiod
+    out[start] = prev
+    for t in range(start + 1, len(column)):
+        prev = (column[t] - prev) * (2 / (timeperiod + 1)) + prev
+        out[t] = prev
+    return out
+
+
+def reference_rsi(column, timeperiod):
+    def value(gain, loss):
+        # NaN compares False, a NaN average comes out as 0 like in TA-Lib
+        if not abs(gain + loss) >= 1e-8:
+            return 0.0
+        return 100 * gain / (gain + loss)
+
+    out = [math.nan] * len(column)
+    first = first_valid(column)
+    start = first + timeperiod
+    if start >= len(column):
+        return out
+    changes = [column[t] - column[t - 1] for t in range(first + 1, len(column))]
+    gain = sum(max(change, 0) for change in changes[:timeperiod]) / timeperiod
+    loss = sum(max(-change, 0) for change in changes[:timeperiod]) / timeperiod
+    out[start] = value(gain, loss)
+    for t, change in enumerate(changes[timeperiod:], start + 1):
+        # max() would drop a NaN
+        up = change if change > 0 else (change if math.isnan(change) else 0.0)
+        down = -change if change < 0 else (change if math.isnan(change) else 0.0)
+        gain = (gain * (timeperiod - 1) + up) / timeperiod
+        loss = (loss * (timeperiod - 1) + down) / timeperiod
+        out[t] = value(gain, loss)
+    return out
+
+
+def reference_bbands(column, timeperiod, nbdevup, nbdevdn):
+    upper, middle, lower = ([math.nan] * len(column) for _ in range(3))
+    first = first_valid(column)
+    for t in range(first + timeperiod - 1, len(column)):
+        if any(math.isnan(value) for value in column[first : t + 1]):
+            # a gap stays in TA-Lib's running sums
+            continue
+        window = column[t - timeperiod + 1 : t + 1]
+        mean = sum(window) / timeperiod
+        variance = sum((value - mean) ** 2 for value in window) / timeperiod
+        stddev = math.sqrt(variance) if variance >= 1e-8 else 0.0
+        upper[t] = mean + nbdevup * stddev
+        middle[t] = mean
+        lower[t] = mean - nbdevdn * stddev
+    return upper, middle, lower
+
+
+def by_column(reference, values, *args):
+    """``reference`` run on each column of ``values``, stacked as columns again."""
+    results = [reference(list(column), *args) for column in values.T]
+    return np.moveaxis(np.array(results), 0, -1)
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (60, 6)), axis=0))
+    # leading NaNs, more than a timeperiod of them, a gap after the start
+    # and a flat stretch
+    prices[:3, 1] = np.nan
+    prices[:52, 2] = np.nan
+    prices[40, 3] = np.nan
+    prices[:, 4] = 50.0
+    prices[:, 5] = np.nan
+    return prices
+
+
+def assert_same(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-10)
+
+
+@pytest.mark.parametrize('timeperiod', [1, 5, 10])
+def test_ema(prices, timeperiod):
+    expected = by_column(reference_ema, prices, timeperiod)
+    assert_same(ema(prices, timeperiod), expected)
+    assert_same(ema(prices, timeperiod, last=True), expected[-1])
+
+
+@pytest.mark.parametrize('timeperiod', [2, 14])
+def test_rsi(prices, timeperiod):
+    expected = by_column(reference_rsi, prices, timeperiod)
+    assert_same(rsi(prices, timeperiod), expected)
+    assert_same(rsi(prices, timeperiod, last=True), expected[-1])
+
+
+@pytest.mark.parametrize('timeperiod', [5, 20])
+def test_bbands(prices, timeperiod):
+    expected = by_column(reference_bbands, prices, timeperiod, 2.0, 1.5)
+    assert_same(np.array(bbands(prices, timeperiod, 2.0, 1.5)), expected)
+    last = bbands(prices, timeperiod, 2.0, 1.5, last=True)
+    assert_same(np.array(last), expected[:, -1])
+
+
+def test_a_single_column(prices):
+    assert_same(ema(prices[:, 0], 10), ema(prices[:, :1], 10))
+    assert ema(prices[:, 0], 10, last=True).shape == (1,)
+
+
+def test_talib():
+    talib = pytest.importorskip('talib')
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 200)))
+    close[:7] = np.nan
+    assert_same(ema(close, 10)[:, 0], talib.EMA(close, 10))
+    assert_same(rsi(close, 2)[:, 0], talib.RSI(close, 2))
+    for ours, theirs in zip(bbands(close, 20), talib.BBANDS(close, 20)):
+        assert_same(ours[:, 0], theirs)
+
+
+Asset = namedtuple('Asset', 'sid')
+
+
+class History:
+    """``data.history`` of daily opens up to session ``today``, counting the calls."""
+
+    def __init__(self, opens):
+        self.opens = opens
+        self.today = None
+        self.calls = []
+
+    def __call__(self, assets, field, bar_count, frequency):
+        self.calls.append(([asset.sid for asset in assets], bar_count))
+        window = self.opens.iloc[self.today + 1 - bar_count : self.today + 1]
+        return window[[asset.sid for asset in assets]].set_axis(assets, axis=1)
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(2)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (80, 4)), axis=0))
+    sessions = pd.bdate_range('2021-01-04', periods=len(values), tz='UTC')
+    return History(pd.DataFrame(values, index=sessions))
+
+
+def stream(indicators, history, days, assets):
+    for day in days:
+        history.today = day
+        indicators.update(None, assets, history=history)
+
+
+def expected_frame(history, seeded, day, assets):
+    """What the indicators seeded at session ``seeded`` should read at ``day``."""
+    window = history.opens.iloc[seeded - 29 : day + 1][[a.sid for a in assets]]
+    values = window.values
+    return pd.DataFrame(
+        {
+            'price': values[-1],
+            'ema5': ema(values, 5, last=True),
+            'ema10': ema(values, 10, last=True),
+            'rsi2': rsi(values, 2, last=True),
+        },
+        index=assets,
+    )
+
+
+def test_streaming_matches_the_recurrences(history):
+    assets = [Asset(sid) for sid in range(4)]
+    indicators = StreamingIndicators()
+    stream(indicators, history, range(40, 60), assets)
+    pd.testing.assert_frame_equal(
+        indicators.frame(assets), expected_frame(history, 40, 59, assets)
+    )
+    # seeded once, then two bars a session
+    assert [count for _, count in history.calls] == [2, 30] + [2] * 19
+
+
+def test_streaming_reseeds(history):
+    assets = [Asset(sid) for sid in range(4)]
+    indicators = StreamingIndicators()
+    stream(indicators, history, range(40, 50), assets)
+    unrevised = expected_frame(history, 40, 51, assets)
+    history.calls.clear()
+
+    # a split halves sid 1's history, sid 2's last open is revised by a cent
+    # and sid 3 skips a session
+    history.opens.iloc[:50, 1] /= 2
+    history.opens.iloc[49, 2] += 0.01
+    stream(indicators, history, [50], assets[:3])
+    stream(indicators, history, [51], assets)
+    assert history.calls == [([0, 1, 2], 2), ([1], 30), ([0, 1, 2, 3], 2), ([3], 30)]
+
+    frame = indicators.frame(assets)
+    pd.testing.assert_frame_equal(
+        frame.iloc[1:2], expected_frame(history, 50, 51, assets[1:2])
+    )
+    pd.testing.assert_frame_equal(
+        frame.iloc[3:], expected_frame(history, 51, 51, assets[3:])
+    )
+    # the EMAs took in sid 2's open before it was revised
+    pd.testing.assert_series_equal(frame['ema5'].iloc[2:3], unrevised['ema5'].iloc[2:3])
+
+
+def test_streaming_checkpoint(history, tmp_path):
+    assets = [Asset(sid) for sid in range(4)]
+    indicators = StreamingIndicators()
+    stream(indicators, history, range(40, 45), assets)
+    indicators.checkpoint(tmp_path / 'indicators.npz')
+    restored = StreamingIndicators().restore(tmp_path / 'indicators.npz')
+    stream(indicators, history, [45], assets)
+    history.calls.clear()
+    stream(restored, history, [45], assets)
+    assert [count for _, count in history.calls] == [2]
+    pd.testing.assert_frame_equal(restored.frame(assets), indicators.frame(assets))
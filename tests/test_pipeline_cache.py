@@ -0,0 +1,188 @@
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('zipline')
+
+from zipline.pipeline import Pipeline  # noqa: E402
+from zipline.pipeline.factors import AverageDollarVolume, Returns  # noqa: E402
+
+from algos.factors import MomentumQuality, RollingMomentumQuality  # noqa: E402
+from algos.pipeline_cache import CachedPipelineEngine, pipeline_hash  # noqa: E402
+
+PIPELINE = '''
+from zipline.pipeline import Pipeline
+from zipline.pipeline.factors import AverageDollarVolume, Returns
+from algos.factors import MomentumQuality
+
+universe = AverageDollarVolume(window_length=20).top(500)
+pipeline = Pipeline(
+    columns={
+        'momentum': MomentumQuality(window_length=126, mask=universe),
+        'returns': Returns(window_length=21, mask=universe).rank(),
+    },
+    screen=universe,
+)
+'''
+
+
+def make_pipeline():
+    namespace = {}
+    exec(PIPELINE, namespace)
+    return namespace['pipeline']
+
+
+def test_hash_is_the_same_in_another_process():
+    other = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            PIPELINE + 'from algos.pipeline_cache import pipeline_hash\n'
+            'print(pipeline_hash(pipeline))',
+        ],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert other.stdout.strip() == pipeline_hash(make_pipeline())
+
+
+def test_hash_changes_with_the_terms():
+    digest = pipeline_hash(make_pipeline())
+    universe = AverageDollarVolume(window_length=20).top(500)
+    changed = [
+        Pipeline(
+            columns={
+                'momentum': MomentumQuality(window_length=126, mask=universe),
+                'returns': Returns(window_length=21, mask=universe).rank(),
+            },
+        ),
+        Pipeline(
+            columns={
+                'momentum': MomentumQuality(window_length=125, mask=universe),
+                'returns': Returns(window_length=21, mask=universe).rank(),
+            },
+            screen=universe,
+        ),
+        Pipeline(
+            columns={
+                'momentum': MomentumQuality(
+                    window_length=126, mask=universe, momentum='returns'
+                ),
+                'returns': Returns(window_length=21, mask=universe).rank(),
+            },
+            screen=universe,
+        ),
+        Pipeline(
+            columns={
+                'momentum': MomentumQuality(window_length=126, mask=universe),
+                'returns': Returns(window_length=21, mask=universe).rank(
+                    ascending=False
+                ),
+            },
+            screen=universe,
+        ),
+    ]
+    digests = {pipeline_hash(pipeline) for pipeline in changed}
+    assert len(digests) == len(changed) and digest not in digests
+    assert pipeline_hash(make_pipeline(), version=1) != digest
+
+
+def test_hash_ignores_factor_state():
+    factor = RollingMomentumQuality(window_length=63)
+    pipeline = Pipeline(columns={'momentum': factor})
+    digest = pipeline_hash(pipeline)
+    factor._rolling = object()
+    assert pipeline_hash(pipeline) == digest
+
+
+class Asset(SimpleNamespace):
+    def __hash__(self):
+        return hash(self.sid)
+
+
+class Engine:
+    def __init__(self, result):
+        self.result = result
+        self.runs = []
+
+    def run_pipeline(self, pipeline, start_date, end_date, hooks=None):
+        self.runs.append((start_date, end_date))
+        dates = self.result.index.get_level_values(0)
+        return self.result[(dates >= start_date) & (dates <= end_date)]
+
+
+@pytest.fixture
+def assets():
+    return [Asset(sid=sid) for sid in (3, 5, 8)]
+
+
+@pytest.fixture
+def asset_finder(tmp_path, assets):
+    database = tmp_path / 'bundle' / '2021-06-01T00;00;00.000000' / 'assets-7.sqlite'
+    by_sid = {asset.sid: asset for asset in assets}
+    return SimpleNamespace(
+        engine=SimpleNamespace(url=SimpleNamespace(database=str(database))),
+        retrieve_all=lambda sids: [by_sid[sid] for sid in sids],
+    )
+
+
+@pytest.fixture
+def result(assets):
+    dates = pd.date_range('2021-01-04', periods=10, freq='B', tz='UTC')
+    index = pd.MultiIndex.from_product([dates, assets])
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            'momentum': rng.normal(size=len(index)),
+            'rank': np.arange(len(index), dtype=np.int64),
+            'screen': np.arange(len(index)) % 2 == 0,
+        },
+        index=index,
+    )
+
+
+def test_cached_engine(tmp_path, asset_finder, result):
+    engine = Engine(result)
+    start, end = result.index.levels[0][[0, -1]]
+
+    first = CachedPipelineEngine(engine, asset_finder, root=str(tmp_path / 'cache'))
+    pd.testing.assert_frame_equal(
+        first.run_pipeline(make_pipeline(), start, end), result
+    )
+    assert len(engine.runs) == 1
+
+    # another run, with a pipeline built the same way
+    second = CachedPipelineEngine(engine, asset_finder, root=str(tmp_path / 'cache'))
+    pd.testing.assert_frame_equal(
+        second.run_pipeline(make_pipeline(), start, end), result, check_freq=False
+    )
+    middle = result.index.levels[0][[2, 6]]
+    sliced = second.run_pipeline(make_pipeline(), *middle)
+    dates = result.index.get_level_values(0)
+    pd.testing.assert_frame_equal(
+        sliced,
+        result[(dates >= middle[0]) & (dates <= middle[1])],
+        check_freq=False,
+    )
+    assert len(engine.runs) == 1
+
+    # a range past the cached chunk is computed
+    second.run_pipeline(make_pipeline(), start, end + pd.Timedelta(days=1))
+    assert len(engine.runs) == 2
+
+
+def test_cached_engine_passes_labels_through(tmp_path, asset_finder, result):
+    result['sector'] = 'tech'
+    engine = Engine(result)
+    cached = CachedPipelineEngine(engine, asset_finder, root=str(tmp_path))
+    start, end = result.index.levels[0][[0, -1]]
+    cached.run_pipeline(make_pipeline(), start, end)
+    cached.run_pipeline(make_pipeline(), start, end)
+    assert len(engine.runs) == 2
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from algos.regression import RollingLinregress, linregress_columns, pearson_columns
+
+
+def scipy_columns(y):
+    """slope, intercept and r_value of each column from scipy, on its non-NaN rows."""
+    results = []
+    for column in y.T:
+        valid = ~np.isnan(column)
+        result = stats.linregress(np.flatnonzero(valid), column[valid])
+        results.append((result.slope, result.intercept, result.rvalue))
+    return np.array(results).T
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (90, 12)), axis=0))
+
+
+def test_matches_scipy(prices):
+    np.testing.assert_allclose(
+        np.array(linregress_columns(prices)), scipy_columns(prices), rtol=1e-10
+    )
+
+
+def test_float32(prices):
+    slope, intercept, r_value = linregress_columns(prices, dtype=np.float32)
+    assert slope.dtype == np.float32
+    expected = scipy_columns(prices)
+    np.testing.assert_allclose(slope, expected[0], rtol=1e-3, atol=1e-4)
+    np.testing.assert_allclose(r_value, expected[2], rtol=1e-3, atol=1e-4)
+
+
+def test_flat_column():
+    y = np.column_stack([np.full(10, 5.0), np.arange(10.0)])
+    slope, intercept, r_value = linregress_columns(y)
+    np.testing.assert_array_equal(slope, [0.0, 1.0])
+    np.testing.assert_array_equal(intercept, [5.0, 0.0])
+    np.testing.assert_array_equal(r_value, [0.0, 1.0])
+
+
+def test_missing_rows(prices):
+    prices[:5, 0] = np.nan
+    prices[[10, 40], 1] = np.nan
+    prices[:85, 2] = np.nan
+
+    slope, intercept, r_value = linregress_columns(prices, min_obs=20)
+    expected = scipy_columns(prices)
+    np.testing.assert_allclose(slope[:2], expected[0, :2], rtol=1e-10)
+    np.testing.assert_allclose(intercept[:2], expected[1, :2], rtol=1e-10)
+    np.testing.assert_allclose(r_value[:2], expected[2, :2], rtol=1e-10)
+    np.testing.assert_allclose(r_value[3:], expected[2, 3:], rtol=1e-10)
+    # 5 rows are fewer than min_obs
+    assert np.isnan([slope[2], intercept[2], r_value[2]]).all()
+
+
+def test_missing_rows_need_all_by_default(prices):
+    prices[3, 4] = np.nan
+    slope, intercept, r_value = linregress_columns(prices)
+    assert np.isnan([slope[4], intercept[4], r_value[4]]).all()
+    assert not np.isnan(np.delete(r_value, 4)).any()
+
+
+def test_single_point_is_not_a_line():
+    y = np.full((5, 1), np.nan)
+    y[2] = 1.0
+    assert np.isnan(linregress_columns(y, min_obs=1)).all()
+
+
+def test_pearson_columns(prices):
+    prices[:30, 0] = np.nan
+    np.testing.assert_allclose(
+        pearson_columns(prices, min_obs=60), scipy_columns(prices)[2], rtol=1e-10
+    )
+    assert np.isnan(pearson_columns(prices)[0])
+
+
+WINDOW = 20
+
+
+@pytest.fixture
+def sessions():
+    return pd.bdate_range('2021-01-04', periods=120, tz='UTC')
+
+
+@pytest.fixture
+def history(sessions):
+    rng = np.random.default_rng(1)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(sessions), 8)), axis=0))
+
+
+def assert_rolls(rolling, sessions, history, days, sids=None):
+    """Update ``rolling`` for each of ``days`` and compare with a full recompute."""
+    if sids is None:
+        sids = np.arange(history.shape[1])
+    for day in days:
+        y = history[day - WINDOW + 1 : day + 1]
+        np.testing.assert_allclose(
+            np.array(rolling.update(sessions[day], sids, y)),
+            np.array(linregress_columns(y)),
+            rtol=1e-9,
+            atol=1e-12,
+        )
+
+
+def test_rolling_matches_full_recompute(sessions, history):
+    rolling = RollingLinregress(WINDOW, sessions, refresh=1000)
+    assert_rolls(rolling, sessions, history, range(WINDOW, len(sessions)))
+    # every session after the first one rolled forward
+    assert rolling._age == len(sessions) - WINDOW - 1
+
+
+def test_rolling_refresh(sessions, history):
+    rolling = RollingLinregress(WINDOW, sessions, refresh=7)
+    assert_rolls(rolling, sessions, history, range(WINDOW, WINDOW + 20))
+    assert rolling._age < 7
+
+
+def test_rolling_after_a_skipped_session(sessions, history):
+    rolling = RollingLinregress(WINDOW, sessions)
+    assert_rolls(rolling, sessions, history, [30, 31, 33])
+    assert rolling._age == 0
+    assert_rolls(rolling, sessions, history, [34])
+    assert rolling._age == 1
+
+
+def test_rolling_after_an_adjustment(sessions, history):
+    rolling = RollingLinregress(WINDOW, sessions)
+    assert_rolls(rolling, sessions, history, [30])
+    # a split halves everything before session 31 for the second asset
+    history = history.copy()
+    history[:31, 1] /= 2
+    assert_rolls(rolling, sessions, history, [31, 32])
+
+
+def test_rolling_with_changing_sids(sessions, history):
+    rolling = RollingLinregress(WINDOW, sessions)
+    assert_rolls(rolling, sessions, history[:, :5], [30], sids=np.arange(5))
+    # reordered, one dropped and one new sid
+    sids = np.array([7, 3, 0, 2])
+    assert_rolls(rolling, sessions, history[:, sids], [31, 32], sids=sids)
+
+
+def test_rolling_with_missing_values(sessions, history):
+    history = history.copy()
+    history[40:45, 2] = np.nan
+    rolling = RollingLinregress(WINDOW, sessions)
+    days = range(WINDOW, 80)
+    sids = np.arange(history.shape[1])
+    for day in days:
+        y = history[day - WINDOW + 1 : day + 1]
+        slope, intercept, r_value = rolling.update(sessions[day], sids, y)
+        expected = linregress_columns(y)
+        np.testing.assert_allclose(r_value, expected[2], rtol=1e-9, atol=1e-12)
+        assert np.isnan(r_value[2]) == (40 <= day < 45 + WINDOW - 1)
+
+
+def test_rolling_checks_the_window_length(sessions, history):
+    with pytest.raises(ValueError):
+        RollingLinregress(WINDOW, sessions).update(sessions[30], np.arange(8), history)
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('zipline')
+
+from algos.schedule import EveryNMonths, EveryNSessions  # noqa: E402
+
+
+@pytest.fixture
+def sessions():
+    # weekdays, with 2021-01-01 and 2021-04-02 off
+    days = pd.bdate_range('2021-01-01', '2021-12-31', tz='UTC')
+    return days.drop(pd.DatetimeIndex(['2021-01-01', '2021-04-02'], tz='UTC'))
+
+
+def fired(rule, sessions):
+    return sessions[rule.select_ordinals(sessions)]
+
+
+def test_every_n_sessions(sessions):
+    days = fired(EveryNSessions(3), sessions)
+    assert list(days[:3].strftime('%Y-%m-%d')) == [
+        '2021-01-06',
+        '2021-01-11',
+        '2021-01-14',
+    ]
+    assert (sessions.get_indexer(days) % 3 == 2).all()
+
+
+def test_every_n_sessions_from_an_anchor(sessions):
+    days = fired(
+        EveryNSessions(3, anchor=pd.Timestamp('2021-03-31', tz='UTC')), sessions
+    )
+    # the anchor counts as the 1st session, April 2nd is a holiday
+    assert list(days[:2].strftime('%Y-%m-%d')) == ['2021-04-05', '2021-04-08']
+
+
+def test_every_session(sessions):
+    assert fired(EveryNSessions(1), sessions).equals(sessions)
+
+
+def test_every_n_months(sessions):
+    days = fired(EveryNMonths(3), sessions)
+    assert list(days.strftime('%Y-%m-%d')) == [
+        '2021-01-04',
+        '2021-04-01',
+        '2021-07-01',
+        '2021-10-01',
+    ]
+
+
+def test_every_n_months_with_an_offset(sessions):
+    days = fired(EveryNMonths(6, days_offset=1), sessions)
+    assert list(days.strftime('%Y-%m-%d')) == ['2021-01-05', '2021-07-02']
+
+
+def test_months_too_short_for_the_offset(sessions):
+    # January and February have 20 sessions, the other months more
+    days = fired(EveryNMonths(1, days_offset=20), sessions)
+    assert list(days.month) == list(range(3, 13))
+    assert (days.day >= 29).all()
+
+
+@pytest.mark.parametrize('n', [0, 13])
+def test_every_n_months_bounds(n):
+    with pytest.raises(ValueError):
+        EveryNMonths(n)
+
+
+def test_every_n_sessions_bounds():
+    with pytest.raises(ValueError):
+        EveryNSessions(0)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from algos.screens import TopVolume, ranked, top_k
+
+
+@pytest.mark.parametrize('k', [1, 3, 5, 10])
+def test_top_k(k):
+    values = np.array([3.0, np.nan, 7.0, 1.0, 6.0, -2.0, np.nan])
+    expected = sorted(
+        range(len(values)),
+        key=lambda i: -np.inf if np.isnan(values[i]) else values[i],
+        reverse=True,
+    )[:k]
+    assert list(top_k(values, k)) == expected
+
+
+def test_ranked():
+    frame = pd.DataFrame({'asset': list('abcde')})
+    scores = [1.0, 3.0, 2.0, 3.0, 0.5]
+    assert list(ranked(frame, scores)['asset']) == ['b', 'd', 'c', 'a', 'e']
+    assert list(ranked(frame, scores, limit=2)['asset']) == ['b', 'd']
+
+
+def test_top_volume():
+    volume = pd.DataFrame(
+        {'a': [10.0, 20.0], 'b': [np.nan, 50.0], 'c': [5.0, 5.0], 'd': [np.nan] * 2}
+    )
+    calls = []
+
+    def history(assets, field, bar_count, frequency):
+        calls.append((assets, field, bar_count, frequency))
+        return volume
+
+    assert TopVolume(k=2)(None, 'abcd', history=history) == ['b', 'a']
+    assert calls == [(list('abcd'), 'volume', 391, '1m')]